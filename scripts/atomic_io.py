@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""Atomic file writes shared by the pipeline, merge, page build and watch scripts.
+
+Content goes to a temp file in the target's directory, which is renamed over
+the target with ``os.replace`` once it is complete, so readers (the site
+build, the query service, a concurrent pipeline run) only ever see the old or
+the new file. Temp names carry the pid and a random suffix, so two writers of
+the same target (e.g. ``watch.py`` and a manual run) never share a temp file.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import pathlib
+import uuid
+from typing import Any, Iterator, Optional, TextIO
+
+
+def temp_path(path: pathlib.Path) -> pathlib.Path:
+  return path.with_name(f".{path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+
+
+@contextlib.contextmanager
+def atomic_open(path: pathlib.Path) -> Iterator[TextIO]:
+  """Yield a text handle whose content replaces ``path`` when the block exits cleanly.
+
+  If the block raises (or a generator holding it is closed early) the temp
+  file is removed and ``path`` is left untouched.
+  """
+
+  path.parent.mkdir(parents=True, exist_ok=True)
+  tmp = temp_path(path)
+  try:
+    with tmp.open("w", encoding="utf-8") as fh:
+      yield fh
+    os.replace(tmp, path)
+  finally:
+    tmp.unlink(missing_ok=True)
+
+
+def write_text_atomic(path: pathlib.Path, content: str) -> None:
+  with atomic_open(path) as fh:
+    fh.write(content)
+
+
+def write_json_atomic(path: pathlib.Path, payload: Any, **dump_options: Any) -> None:
+  """Write ``payload`` as indented UTF-8 JSON with a trailing newline."""
+
+  options = {"indent": 2, "ensure_ascii": False, **dump_options}
+  write_text_atomic(path, json.dumps(payload, **options) + "\n")
+
+
+def file_digest(path: pathlib.Path) -> Optional[str]:
+  """SHA-1 of ``path``'s bytes (``None`` if missing), to tell whether a file changed since it was written."""
+
+  if not path.exists():
+    return None
+  return hashlib.sha1(path.read_bytes()).hexdigest()
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""Benchmarks for the hospitals.co.zw data tooling.
+
+Each subcommand builds a synthetic catalogue shaped like ``data/hospitals.json``
+and times one part of the pipeline, e.g.::
+
+  python scripts/benchmark.py merge --records 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import csv
+import http.client
+import importlib.util
+import io
+import json
+import pathlib
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from typing import Callable, Dict, Iterable, List
+from urllib.parse import urlencode
+
+import scrape_hospitals as pipeline
+import update_hospitals
+from geocode import Gazetteer, fill_missing_coordinates
+from query_service import CatalogueIndex, make_server
+
+Hospital = Dict[str, object]
+
+SCRIPTS_DIR = pathlib.Path(__file__).resolve().parent
+HEAVY_PARSERS = ["openpyxl", "pdfplumber", "pdfminer", "PIL", "xlrd"]
+
+PROVINCES = {
+  "Harare": ["Harare", "Chitungwiza", "Epworth"],
+  "Bulawayo": ["Bulawayo"],
+  "Manicaland": ["Mutare", "Chipinge", "Nyanga", "Rusape"],
+  "Mashonaland Central": ["Bindura", "Mazowe", "Shamva"],
+  "Mashonaland East": ["Marondera", "Murehwa", "Mutoko"],
+  "Mashonaland West": ["Chinhoyi", "Kadoma", "Karoi"],
+  "Masvingo": ["Masvingo", "Chiredzi", "Gutu"],
+  "Matabeleland North": ["Hwange", "Victoria Falls", "Lupane"],
+  "Matabeleland South": ["Gwanda", "Beitbridge", "Plumtree"],
+  "Midlands": ["Gweru", "Kwekwe", "Zvishavane"],
+}
+FACILITY_TYPES = ["Clinic", "Pharmacy", "District Hospital", "Mission Hospital", "Private Hospital", "Dental Clinic"]
+SERVICES = ["ER", "Maternity", "Lab", "OPD", "MCH", "HIV", "Dispensary", "ICU", "X-Ray"]
+SYLLABLES = ["ba", "chi", "do", "ga", "ka", "la", "ma", "mu", "nya", "ru", "se", "ta", "tsi", "we", "zvi", "ngo"]
+NAME_WORDS = ["St", "Mary", "Parirenyatwa", "Avenues", "Baines", "Mpilo", "Musiso", "Karanda", "Sally", "Mugabe", "Chitando", "Hope", "Unity", "Grace"]
+
+
+def synthetic_records(count: int, seed: int = 7) -> List[Hospital]:
+  """Generate ``count`` unique catalogue records with realistic field spread."""
+
+  rng = random.Random(seed)
+  provinces = sorted(PROVINCES)
+  records: List[Hospital] = []
+  for idx in range(count):
+    province = rng.choice(provinces)
+    city = rng.choice(PROVINCES[province])
+    facility_type = rng.choice(FACILITY_TYPES)
+    name = f"{' '.join(rng.sample(NAME_WORDS, 2))} {facility_type} {idx}"
+    records.append({
+      "id": f"synthetic-{idx}",
+      "name": name,
+      "aliases": [],
+      "facility_type": facility_type,
+      "ownership": rng.choice(["Government", "Mission", "Private", "Council"]),
+      "province": province,
+      "district": city,
+      "city": city,
+      "services": rng.sample(SERVICES, rng.randint(1, 4)),
+      "open_24h": rng.random() < 0.3,
+      "phone": None if rng.random() < 0.5 else f"+263 {rng.randint(200, 999)} {rng.randint(100000, 999999)}",
+      "lat": None,
+      "lon": None,
+      "tier": rng.choice(["Tier 1", "Tier 2", "Tier 3"]),
+      "source": [rng.choice(["hpa_registered_facilities", "mcaz_pharmacies_2024", "manual_seed"])],
+      "verified": rng.random() < 0.2,
+    })
+  return records
+
+
+def scraped_batch(existing: List[Hospital], overlap: float = 0.5, seed: int = 11) -> List[Hospital]:
+  """Build a scrape that re-sees ``overlap`` of ``existing`` and adds as many new rows."""
+
+  rng = random.Random(seed)
+  seen = rng.sample(existing, int(len(existing) * overlap))
+  updates = [dict(record, phone=record.get("phone") or "+263 242 000000", source=["scrape"]) for record in seen]
+  fresh = synthetic_records(len(seen), seed=seed + 1)
+  for record in fresh:
+    record["id"] = f"new-{record['id']}"
+    record["name"] = f"New {record['name']}"
+  return updates + fresh
+
+
+def timed(label: str, func: Callable[[], object]) -> float:
+  start = time.perf_counter()
+  func()
+  elapsed = time.perf_counter() - start
+  print(f"  {label:<28} {elapsed:8.3f}s")
+  return elapsed
+
+
+def bench_merge(args: argparse.Namespace) -> None:
+  existing = synthetic_records(args.records)
+  scraped = scraped_batch(existing)
+  print(f"Merging {len(scraped)} scraped records into {len(existing)} existing records")
+
+  def json_merge() -> None:
+    base = json.loads(json.dumps(existing))
+    existing_map = {update_hospitals.make_key(record): record for record in base}
+    update_hospitals.merge_records(existing_map, scraped)
+
+  def end_to_end(out: pathlib.Path, run: Callable[[], object]) -> Callable[[], object]:
+    """Run a full ``update_hospitals`` merge against catalogue files under ``out``."""
+
+    def call() -> object:
+      paths = {"CURRENT_PATH": out / "hospitals.json", "FULL_PATH": out / "hospitals_full.json", "FACETS_PATH": out / "facets.json"}
+      saved = {name: getattr(update_hospitals, name) for name in paths}
+      try:
+        for name, path in paths.items():
+          setattr(update_hospitals, name, path)
+        with contextlib.redirect_stdout(io.StringIO()):
+          return run()
+      finally:
+        for name, path in saved.items():
+          setattr(update_hospitals, name, path)
+
+    return call
+
+  with tempfile.TemporaryDirectory() as tmp:
+    out = pathlib.Path(tmp)
+    json_time = timed("json merge", json_merge)
+    store = update_hospitals.open_store(out / "catalogue.sqlite")
+    timed("sqlite seed (one-off)", lambda: store.upsert_many((update_hospitals.make_key(r), r) for r in existing))
+    store_time = timed("sqlite merge", lambda: update_hospitals.merge_into_store(store, scraped))
+    timed("sqlite export", lambda: store.export_json(out / "hospitals.json"))
+    timed("sqlite query (province+type)", lambda: store.query(province="Harare", facility_type="Clinic"))
+    timed("sqlite query (service)", lambda: store.query(service="ICU", limit=50))
+    store.close()
+
+    # Whole runs, including loading/reconciling the catalogue, coordinate fills, exports and facets.
+    for name in ("json", "sqlite"):
+      (out / name).mkdir()
+      (out / name / "hospitals.json").write_text(json.dumps(existing, indent=2, ensure_ascii=False) + "\n")
+    json_run = timed("json run (end to end)", end_to_end(out / "json", lambda: update_hospitals.run_json_merge(scraped, [])))
+    store_path = out / "sqlite" / "catalogue.sqlite"
+    timed("sqlite first sync (one-off)", end_to_end(out / "sqlite", lambda: update_hospitals.run_store_merge(store_path, [], [])))
+    store_run = timed("sqlite run (end to end)", end_to_end(out / "sqlite", lambda: update_hospitals.run_store_merge(store_path, scraped, [])))
+  print(f"  sqlite/json merge ratio      {store_time / json_time:8.2f}x")
+  print(f"  sqlite/json run ratio        {store_run / json_run:8.2f}x")
+
+
+def percentile(values: List[float], pct: float) -> float:
+  ordered = sorted(values)
+  if not ordered:
+    return 0.0
+  return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def query_mix(rng: random.Random) -> str:
+  province = rng.choice(sorted(PROVINCES))
+  params = rng.choice([
+    {"province": province},
+    {"province": province, "facility_type": "Clinic", "page": 2, "per_page": 20},
+    {"services": rng.choice(SERVICES), "open_24h": "true"},
+    {"tier": "Tier 1", "verified": "true"},
+    {"district": rng.choice(PROVINCES[province]), "services": "Lab"},
+    None,
+  ])
+  if params is None:
+    return f"/facilities/synthetic-{rng.randint(0, 999)}"
+  return f"/facilities?{urlencode(params)}"
+
+
+def bench_query_service(args: argparse.Namespace) -> None:
+  records = synthetic_records(args.records)
+  start = time.perf_counter()
+  index = CatalogueIndex(records, version="benchmark")
+  print(f"Indexed {len(records)} records in {time.perf_counter() - start:.3f}s")
+  server = make_server(index, port=0, quiet=True)
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  port = server.server_port
+
+  latencies: List[float] = []
+  statuses: Dict[int, int] = {}
+  lock = threading.Lock()
+
+  def worker(worker_id: int) -> None:
+    rng = random.Random(worker_id)
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    etags: Dict[str, str] = {}
+    local: List[float] = []
+    local_status: Dict[int, int] = {}
+    for _ in range(args.requests // args.concurrency):
+      path = query_mix(rng)
+      headers = {"If-None-Match": etags[path]} if args.conditional and path in etags else {}
+      began = time.perf_counter()
+      conn.request("GET", path, headers=headers)
+      resp = conn.getresponse()
+      resp.read()
+      local.append(time.perf_counter() - began)
+      local_status[resp.status] = local_status.get(resp.status, 0) + 1
+      if resp.getheader("ETag"):
+        etags[path] = resp.getheader("ETag")
+    conn.close()
+    with lock:
+      latencies.extend(local)
+      for status, count in local_status.items():
+        statuses[status] = statuses.get(status, 0) + count
+
+  threads = [threading.Thread(target=worker, args=(idx,)) for idx in range(args.concurrency)]
+  start = time.perf_counter()
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+  elapsed = time.perf_counter() - start
+  server.shutdown()
+  server.server_close()
+
+  print(f"  requests                     {len(latencies):8d}")
+  print(f"  statuses                     {dict(sorted(statuses.items()))}")
+  print(f"  requests/sec                 {len(latencies) / elapsed:8.1f}")
+  print(f"  p50 latency                  {percentile(latencies, 50) * 1000:8.2f}ms")
+  print(f"  p99 latency                  {percentile(latencies, 99) * 1000:8.2f}ms")
+
+
+def import_profile(statement: str) -> Dict[str, int]:
+  """Run ``statement`` under ``-X importtime`` and return cumulative microseconds per module."""
+
+  result = subprocess.run(
+    [sys.executable, "-X", "importtime", "-c", statement],
+    cwd=SCRIPTS_DIR,
+    capture_output=True,
+    text=True,
+    check=True,
+  )
+  cumulative: Dict[str, int] = {}
+  for line in result.stderr.splitlines():
+    if not line.startswith("import time:") or "cumulative" in line:
+      continue
+    _, self_us, total_us, name = (part.strip() for part in line.replace("import time:", "|", 1).split("|"))
+    cumulative[name] = int(total_us)
+  return cumulative
+
+
+def bench_import_time(args: argparse.Namespace) -> None:
+  samples: List[int] = []
+  profile: Dict[str, int] = {}
+  for _ in range(args.runs):
+    profile = import_profile("import scrape_hospitals")
+    samples.append(profile.get("scrape_hospitals", 0))
+  median_ms = statistics.median(samples) / 1000
+  heavy = [name for name in HEAVY_PARSERS if name in profile]
+  print(f"  scrape_hospitals import (median of {args.runs}) {median_ms:8.2f}ms")
+  print(f"  heavy parsers imported       {', '.join(heavy) or 'none'}")
+
+  available = [name for name in ["openpyxl", "pdfplumber", "xlrd"] if importlib.util.find_spec(name)]
+  if available:
+    eager = import_profile(f"import {', '.join(available)}")
+    eager_ms = sum(eager.get(name, 0) for name in available) / 1000
+    print(f"  avoided eager parser imports {eager_ms:8.2f}ms ({', '.join(available)})")
+
+  if heavy or (args.budget_ms and median_ms > args.budget_ms):
+    raise SystemExit(f"Import-time guard failed: {median_ms:.2f}ms (budget {args.budget_ms}ms), heavy={heavy}")
+
+
+def bench_geocode(args: argparse.Namespace) -> None:
+  records = synthetic_records(args.records)
+  rng = random.Random(3)
+  centres = {province: (-20 + rng.uniform(-2, 2), 30 + rng.uniform(-2, 2)) for province in PROVINCES}
+  for record in records:
+    if rng.random() < args.geocoded:
+      lat, lon = centres[record["province"]]
+      record["lat"] = lat + rng.uniform(-0.5, 0.5)
+      record["lon"] = lon + rng.uniform(-0.5, 0.5)
+    elif rng.random() < 0.1:
+      record["city"] = f"{record['city']}e"  # misspelt town to exercise the fuzzy fallback
+  print(f"Geocoding {len(records)} records ({args.geocoded:.0%} already have coordinates)")
+
+  built: Dict[str, Gazetteer] = {}
+  timed("build gazetteer", lambda: built.setdefault("gazetteer", Gazetteer.from_records(records)))
+  filled: Dict[str, int] = {}
+  elapsed = timed("fill missing coordinates", lambda: filled.update(fill_missing_coordinates(records, built["gazetteer"])))
+  missing = sum(filled.values())
+  print(f"  records/sec                  {missing / elapsed:8.0f}")
+  print(f"  filled by precision          {dict(sorted(filled.items()))}")
+
+
+def write_raw_drop(path: pathlib.Path, count: int, duplicates: float) -> int:
+  """Write a CSV raw drop of ``count`` facilities plus re-listed duplicates; return rows written."""
+
+  records = synthetic_records(count)
+  rng = random.Random(5)
+  for record in records:
+    # Coined names keep unrelated facilities below the fuzzy-match threshold, as in real drops.
+    coined = " ".join("".join(rng.choice(SYLLABLES) for _ in range(3)).title() for _ in range(2))
+    record["name"] = f"{coined} {record['facility_type']}"
+  rows = records + [dict(record, name=record["name"].upper()) for record in rng.sample(records, int(count * duplicates))]
+  rng.shuffle(rows)
+  fields = ["name", "facility_type", "ownership", "province", "district", "city", "services", "open_24h", "phone", "tier"]
+  with path.open("w", newline="") as fh:
+    writer = csv.DictWriter(fh, fieldnames=fields, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+      writer.writerow(dict(row, services="; ".join(row["services"]), open_24h="yes" if row["open_24h"] else "no"))
+  return len(rows)
+
+
+def traced(label: str, func: Callable[[], List[Hospital]]) -> int:
+  """Run ``func`` under tracemalloc and print its wall time and peak traced memory."""
+
+  tracemalloc.start()
+  start = time.perf_counter()
+  records = func()
+  elapsed = time.perf_counter() - start
+  _, peak = tracemalloc.get_traced_memory()
+  tracemalloc.stop()
+  print(f"  {label:<28} {elapsed:8.3f}s  peak {peak / 2**20:8.1f} MiB  ({len(records)} records)")
+  return peak
+
+
+def bench_pipeline_memory(args: argparse.Namespace) -> None:
+  with tempfile.TemporaryDirectory() as tmp:
+    raw_dir = pathlib.Path(tmp)
+    rows = write_raw_drop(raw_dir / "synthetic_facilities.csv", args.records, args.duplicates)
+    sources = pipeline.pipeline_sources(["synthetic_facilities"], raw_dir)
+    print(f"Running load → validate over {rows} raw CSV rows")
+
+    def materialised() -> List[Hospital]:
+      # The pre-streaming shape: every stage hands a full list to the next.
+      records: List = list(pipeline.stage_load(sources))
+      for stage in ["normalize", "dedup", "map", "validate"]:
+        records = list(pipeline.STAGE_FUNCTIONS[stage](records))
+      return records
+
+    def streamed() -> List[Hospital]:
+      records: Iterable = pipeline.stage_load(sources)
+      for stage in ["normalize", "dedup", "map", "validate"]:
+        records = pipeline.STAGE_FUNCTIONS[stage](records)
+      return list(records)
+
+    baseline = traced("materialised stages", materialised)
+    streaming = traced("streamed stages", streamed)
+  print(f"  peak memory saved            {1 - streaming / baseline:8.1%}")
+
+
+def noisy_name(name: str, rng: random.Random) -> str:
+  """A plausible re-listing of ``name``: abbreviation, typo, dropped word or case change."""
+
+  variant = rng.choice(["abbreviate", "typo", "drop", "case"])
+  if variant == "abbreviate":
+    return name.replace("Hospital", "Hosp").replace("Clinic", "Clnc")
+  if variant == "typo":
+    position = rng.randrange(1, len(name) - 1)
+    return name[:position] + name[position + 1:]
+  if variant == "drop" and name.count(" ") > 1:
+    words = name.split()
+    words.pop(rng.randrange(len(words) - 1))
+    return " ".join(words)
+  return name.upper()
+
+
+def cluster_pairs(positions: List[int]) -> set:
+  """Unordered input-record pairs that ended up in the same canonical record."""
+
+  clusters: Dict[int, List[int]] = {}
+  for record, position in enumerate(positions):
+    clusters.setdefault(position, []).append(record)
+  return {(a, b) for members in clusters.values() for i, a in enumerate(members) for b in members[i + 1:]}
+
+
+def bench_name_matching(args: argparse.Namespace) -> None:
+  rng = random.Random(9)
+  base = synthetic_records(args.records)
+  for record in base:
+    coined = " ".join("".join(rng.choice(SYLLABLES) for _ in range(3)).title() for _ in range(2))
+    record.update(name=f"{coined} {record['facility_type']}", id=None, phone=None)
+  rows = [(index, dict(record)) for index, record in enumerate(base)]
+  rows += [(index, dict(base[index], name=noisy_name(base[index]["name"], rng)))
+           for index in rng.sample(range(len(base)), int(len(base) * args.duplicates))]
+  rng.shuffle(rows)
+  records = [record for _, record in rows]
+  truth = cluster_pairs([facility for facility, _ in rows])
+  print(f"Deduplicating {len(records)} records ({len(truth)} true duplicate pairs)")
+
+  assigned: Dict[str, List[int]] = {}
+  for engine in pipeline.MATCH_ENGINES:
+    elapsed = timed(f"{engine} engine", lambda: assigned.__setitem__(engine, pipeline.dedup_assignments(
+      (dict(record) for record in records), engine=engine)[1]))
+    found = cluster_pairs(assigned[engine])
+    precision = len(found & truth) / len(found) if found else 1.0
+    recall = len(found & truth) / len(truth) if truth else 1.0
+    print(f"  {engine + ' records/sec':<28} {len(records) / elapsed:8.0f}  precision {precision:.3f}  recall {recall:.3f}")
+
+  sequence, tfidf = (cluster_pairs(assigned[engine]) for engine in pipeline.MATCH_ENGINES)
+  union = sequence | tfidf
+  print(f"  agreement with sequence      {len(sequence & tfidf) / len(union) if union else 1.0:8.1%}"
+        f"  (only sequence {len(sequence - tfidf)}, only tfidf {len(tfidf - sequence)})")
+
+
+def main(argv: List[str] | None = None) -> None:
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  sub = parser.add_subparsers(dest="command", required=True)
+
+  merge = sub.add_parser("merge", help="JSON vs SQLite catalogue merge time")
+  merge.add_argument("--records", type=int, default=100_000)
+  merge.set_defaults(func=bench_merge)
+
+  query = sub.add_parser("query-service", help="Load-test the local query service (requests/sec, p99)")
+  query.add_argument("--records", type=int, default=20_000)
+  query.add_argument("--requests", type=int, default=5_000)
+  query.add_argument("--concurrency", type=int, default=8)
+  query.add_argument("--conditional", action="store_true", help="Revalidate with If-None-Match after first fetch")
+  query.set_defaults(func=bench_query_service)
+
+  geocode = sub.add_parser("geocode", help="Offline gazetteer build + batch fill throughput")
+  geocode.add_argument("--records", type=int, default=100_000)
+  geocode.add_argument("--geocoded", type=float, default=0.2, help="Share of records that already have coordinates")
+  geocode.set_defaults(func=bench_geocode)
+
+  memory = sub.add_parser("pipeline-memory", help="Peak memory of streamed vs materialised pipeline stages")
+  memory.add_argument("--records", type=int, default=5_000)
+  memory.add_argument("--duplicates", type=float, default=0.2, help="Share of facilities listed twice in the drop")
+  memory.set_defaults(func=bench_pipeline_memory)
+
+  matching = sub.add_parser("name-matching", help="SequenceMatcher vs trigram TF-IDF dedup: speed and agreement")
+  matching.add_argument("--records", type=int, default=5_000)
+  matching.add_argument("--duplicates", type=float, default=0.2, help="Share of facilities re-listed under a noisy name")
+  matching.set_defaults(func=bench_name_matching)
+
+  imports = sub.add_parser("import-time", help="Measure scrape_hospitals import time via -X importtime")
+  imports.add_argument("--runs", type=int, default=5)
+  imports.add_argument("--budget-ms", type=float, default=0, help="Fail when the median exceeds this budget")
+  imports.set_defaults(func=bench_import_time)
+
+  args = parser.parse_args(argv)
+  args.func(args)
+
+
+if __name__ == "__main__":
+  main()
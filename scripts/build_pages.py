@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""Pre-render one static HTML page per facility, plus ``src/sitemap.xml``.
+
+The directory renders facility detail client-side from the full data bundle,
+which is slow on low-end phones. This build step writes a small standalone
+page per mapped record to ``src/facility/<id>/index.html`` so a facility can
+be opened (and indexed) without downloading the catalogue.
+
+Builds are incremental: ``src/facility/manifest.json`` stores a content
+fingerprint per facility, and only pages whose fingerprint changed (or whose
+file is missing) are re-rendered. Pages are written in parallel, and pages for
+facilities that left the catalogue are removed.
+
+Run with ``python scripts/build_pages.py`` after ``scripts/scrape_hospitals.py``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import html
+import json
+import pathlib
+import re
+import shutil
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from atomic_io import write_text_atomic
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+CATALOGUE_PATH = ROOT / "data" / "hospitals.json"
+SITE_DIR = ROOT / "src"
+PAGES_DIRNAME = "facility"
+MANIFEST_NAME = "manifest.json"
+SITE_URL = "https://hospitals.co.zw"
+
+# Bump when the page template changes so every page is re-rendered once.
+TEMPLATE_VERSION = 1
+
+Hospital = Dict[str, Any]
+
+STATIC_URLS: List[Tuple[str, str, str]] = [
+  ("/", "daily", "1.0"),
+  ("/data/hospitals.json", "daily", "0.9"),
+  ("/data/hospitals_full.json", "daily", "0.6"),
+  ("/robots.txt", "monthly", "0.2"),
+]
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+  <head>
+    <meta charset="UTF-8" />
+    <meta name="viewport" content="width=device-width, initial-scale=1" />
+    <title>{title} &mdash; Hospitals.co.zw</title>
+    <meta name="description" content="{description}" />
+    <link rel="canonical" href="{url}" />
+    <link rel="stylesheet" href="/styles.css" />
+    <script type="application/ld+json">{json_ld}</script>
+  </head>
+  <body>
+    <div class="emergency-banner" role="note">
+      <div class="emergency-banner__inner">
+        <span class="emergency-banner__label">Need urgent help?</span>
+        <a class="emergency-banner__cta" href="tel:112">Tap to call 112</a>
+      </div>
+    </div>
+    <main class="facility-page">
+      <p><a href="/">&larr; All facilities</a></p>
+      <h1>{title}</h1>
+      <p class="facility-page__meta">{summary}</p>
+      <dl class="facility-page__details">
+{details}
+      </dl>
+      <p class="facility-page__actions">{actions}</p>
+      <p class="facility-page__verified">Last verified: {last_verified}</p>
+    </main>
+  </body>
+</html>
+"""
+
+
+def page_slug(record: Hospital) -> str:
+  """URL-safe directory name for a facility page, derived from its ``id``."""
+  return re.sub(r"[^a-z0-9]+", "-", str(record.get("id") or "").lower()).strip("-")
+
+
+def page_url(slug: str) -> str:
+  return f"{SITE_URL}/{PAGES_DIRNAME}/{slug}/"
+
+
+def fingerprint(record: Hospital) -> str:
+  payload = json.dumps([TEMPLATE_VERSION, record], sort_keys=True, ensure_ascii=False, default=str)
+  return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def _text(value: Any) -> str:
+  if isinstance(value, list):
+    return ", ".join(str(item) for item in value if str(item).strip())
+  if isinstance(value, bool):
+    return "Yes" if value else "No"
+  return "" if value is None else str(value).strip()
+
+
+def json_ld(record: Hospital, url: str) -> str:
+  """schema.org markup for the facility; ``</`` is escaped so it cannot close the script tag."""
+
+  data: Dict[str, Any] = {
+    "@context": "https://schema.org",
+    "@type": "Pharmacy" if "pharmacy" in _text(record.get("facility_type")).lower() else "MedicalOrganization",
+    "name": record.get("name"),
+    "url": url,
+    "address": {
+      "@type": "PostalAddress",
+      "streetAddress": record.get("address") or None,
+      "addressLocality": record.get("city") or record.get("district") or None,
+      "addressRegion": record.get("province") or None,
+      "addressCountry": "ZW",
+    },
+  }
+  if record.get("phone"):
+    data["telephone"] = record["phone"]
+  if record.get("lat") is not None and record.get("lon") is not None:
+    data["geo"] = {"@type": "GeoCoordinates", "latitude": record["lat"], "longitude": record["lon"]}
+  data["address"] = {key: value for key, value in data["address"].items() if value is not None}
+  return json.dumps(data, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+
+def render_page(record: Hospital) -> str:
+  slug = page_slug(record)
+  url = page_url(slug)
+  name = _text(record.get("name"))
+  place = ", ".join(part for part in [_text(record.get("district")), _text(record.get("province"))] if part)
+  summary = " · ".join(part for part in [_text(record.get("facility_type")) or "Health facility", place] if part)
+
+  rows = [
+    ("Ownership", record.get("ownership")),
+    ("Address", record.get("address")),
+    ("City", record.get("city")),
+    ("Services", record.get("services")),
+    ("Open 24 hours", record.get("open_24h")),
+    ("Emergency", record.get("emergency_level")),
+    ("Medical aids", record.get("medical_aids")),
+    ("Phone", record.get("phone")),
+    ("Email", record.get("email")),
+    ("Tier", record.get("tier")),
+  ]
+  details = "\n".join(
+    f"        <dt>{label}</dt><dd>{html.escape(_text(value))}</dd>" for label, value in rows if _text(value)
+  )
+
+  actions: List[str] = []
+  if record.get("phone"):
+    actions.append(f'<a href="tel:{html.escape(re.sub(r"[^0-9+]", "", _text(record["phone"])))}">Call</a>')
+  if record.get("lat") is not None and record.get("lon") is not None:
+    maps = f"https://www.google.com/maps/search/?api=1&query={record['lat']},{record['lon']}"
+    actions.append(f'<a href="{html.escape(maps)}" target="_blank" rel="noopener">Directions</a>')
+  if record.get("website"):
+    actions.append(f'<a href="{html.escape(_text(record["website"]))}" rel="noopener">Website</a>')
+
+  return PAGE_TEMPLATE.format(
+    title=html.escape(name),
+    description=html.escape(f"{name}: {summary}. Services, contacts and directions."),
+    url=html.escape(url),
+    json_ld=json_ld(record, url),
+    summary=html.escape(summary),
+    details=details,
+    actions=" · ".join(actions),
+    last_verified=html.escape(_text(record.get("last_verified")) or "unknown"),
+  )
+
+
+def render_sitemap(records: List[Hospital]) -> str:
+  """Sitemap for the static entry points plus every facility page.
+
+  ``lastmod`` comes from the data rather than the build clock, so an
+  unchanged catalogue yields a byte-identical sitemap.
+  """
+
+  dates = [str(record.get("last_updated_at") or record.get("last_verified") or "") for record in records]
+  latest = max((date for date in dates if date), default="")
+  entries: List[Tuple[str, str, str, str]] = [(f"{SITE_URL}{path}", latest, freq, priority) for path, freq, priority in STATIC_URLS]
+  for record, date in sorted(zip(records, dates), key=lambda item: page_slug(item[0])):
+    entries.append((page_url(page_slug(record)), date, "monthly", "0.5"))
+
+  lines = ['<?xml version="1.0" encoding="UTF-8"?>', '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+  for loc, lastmod, freq, priority in entries:
+    lines.append("  <url>")
+    lines.append(f"    <loc>{html.escape(loc)}</loc>")
+    if lastmod:
+      lines.append(f"    <lastmod>{html.escape(lastmod)}</lastmod>")
+    lines.append(f"    <changefreq>{freq}</changefreq>")
+    lines.append(f"    <priority>{priority}</priority>")
+    lines.append("  </url>")
+  lines.append("</urlset>")
+  return "\n".join(lines) + "\n"
+
+
+def load_manifest(path: pathlib.Path) -> Dict[str, str]:
+  try:
+    manifest = json.loads(path.read_text())
+  except (OSError, ValueError):
+    return {}
+  return manifest if isinstance(manifest, dict) else {}
+
+
+def build_pages(
+  records: List[Hospital],
+  site_dir: pathlib.Path = SITE_DIR,
+  workers: Optional[int] = None,
+  force: bool = False,
+) -> Dict[str, int]:
+  """Render changed facility pages and the sitemap; return counts per outcome."""
+
+  pages_dir = site_dir / PAGES_DIRNAME
+  manifest_path = pages_dir / MANIFEST_NAME
+  previous = {} if force else load_manifest(manifest_path)
+
+  current: Dict[str, str] = {}
+  published: List[Hospital] = []
+  pending: List[Tuple[pathlib.Path, Hospital]] = []
+  stats = {"written": 0, "unchanged": 0, "removed": 0, "skipped": 0}
+  for record in records:
+    slug = page_slug(record)
+    if not slug or slug in current:
+      print(f"Skipping page for {record.get('name')!r}: missing or duplicate id {record.get('id')!r}")
+      stats["skipped"] += 1
+      continue
+    current[slug] = fingerprint(record)
+    published.append(record)
+    path = pages_dir / slug / "index.html"
+    if previous.get(slug) == current[slug] and path.exists():
+      stats["unchanged"] += 1
+    else:
+      pending.append((path, record))
+
+  with ThreadPoolExecutor(max_workers=workers) as pool:
+    for _ in pool.map(lambda job: write_text_atomic(job[0], render_page(job[1])), pending):
+      stats["written"] += 1
+
+  for slug in set(previous) - set(current):
+    shutil.rmtree(pages_dir / slug, ignore_errors=True)
+    stats["removed"] += 1
+
+  write_text_atomic(manifest_path, json.dumps(current, indent=2, sort_keys=True) + "\n")
+  sitemap = render_sitemap(published)
+  sitemap_path = site_dir / "sitemap.xml"
+  if not sitemap_path.exists() or sitemap_path.read_text(encoding="utf-8") != sitemap:
+    write_text_atomic(sitemap_path, sitemap)
+  return stats
+
+
+def main(argv: List[str] | None = None) -> None:
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--catalogue", type=pathlib.Path, default=CATALOGUE_PATH)
+  parser.add_argument("--site-dir", type=pathlib.Path, default=SITE_DIR)
+  parser.add_argument("--workers", type=int, default=None, help="Writer threads (default: executor default)")
+  parser.add_argument("--force", action="store_true", help="Ignore the manifest and re-render every page")
+  args = parser.parse_args(argv)
+
+  records = json.loads(args.catalogue.read_text())
+  start = time.perf_counter()
+  stats = build_pages(records, args.site_dir, args.workers, args.force)
+  elapsed = time.perf_counter() - start
+  print(
+    f"Facility pages: {stats['written']} written, {stats['unchanged']} unchanged, "
+    f"{stats['removed']} removed, {stats['skipped']} skipped in {elapsed:.2f}s"
+  )
+
+
+if __name__ == "__main__":
+  main()
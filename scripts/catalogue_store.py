@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""SQLite-backed catalogue store for hospitals.co.zw.
+
+The JSON files under ``data/`` stay the published artefacts. This store keeps
+the same records in an indexed SQLite database so merges can upsert in batched
+transactions and ad-hoc queries (by province, facility type, service, ...) do
+not need the whole catalogue in memory. JSON exports are generated from the
+store in first-inserted order, matching ``update_hospitals.py``.
+
+Besides the merge key and ``id``, each record's alias keys are kept in an
+indexed table when the store is opened with an ``alias_keys`` function
+(``update_hospitals.open_store`` passes ``name_keys``), so a merge resolves a
+scraped record with a few indexed lookups instead of loading every row.
+"""
+
+from __future__ import annotations
+
+import json
+import pathlib
+import sqlite3
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from atomic_io import write_json_atomic
+
+Hospital = Dict[str, Any]
+AliasKeys = Callable[[Hospital], Iterable[str]]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS facilities (
+  seq INTEGER PRIMARY KEY AUTOINCREMENT,
+  merge_key TEXT NOT NULL UNIQUE,
+  id TEXT,
+  name TEXT,
+  province TEXT,
+  district TEXT,
+  facility_type TEXT,
+  tier TEXT,
+  payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_facilities_id ON facilities(id);
+CREATE INDEX IF NOT EXISTS idx_facilities_region ON facilities(province, district);
+CREATE INDEX IF NOT EXISTS idx_facilities_type ON facilities(facility_type);
+CREATE INDEX IF NOT EXISTS idx_facilities_tier ON facilities(tier);
+CREATE TABLE IF NOT EXISTS facility_services (
+  service TEXT NOT NULL,
+  seq INTEGER NOT NULL,
+  PRIMARY KEY (service, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_facility_services_seq ON facility_services(seq);
+CREATE TABLE IF NOT EXISTS facility_aliases (
+  alias TEXT NOT NULL,
+  seq INTEGER NOT NULL,
+  PRIMARY KEY (alias, seq)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_facility_aliases_seq ON facility_aliases(seq);
+CREATE TABLE IF NOT EXISTS store_meta (
+  name TEXT PRIMARY KEY,
+  value TEXT
+);
+"""
+
+UPSERT_SQL = """
+INSERT INTO facilities (merge_key, id, name, province, district, facility_type, tier, payload)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(merge_key) DO UPDATE SET
+  id = excluded.id,
+  name = excluded.name,
+  province = excluded.province,
+  district = excluded.district,
+  facility_type = excluded.facility_type,
+  tier = excluded.tier,
+  payload = excluded.payload
+RETURNING seq
+"""
+
+# SQLite caps the number of bound parameters per statement; stay well below it.
+LOOKUP_CHUNK = 500
+
+
+def _services(record: Hospital) -> set:
+  return {str(service) for service in record.get("services") or [] if str(service).strip()}
+
+
+def _column(record: Hospital, field: str) -> Optional[str]:
+  value = record.get(field)
+  return str(value) if value not in (None, "") else None
+
+
+class CatalogueStore:
+  """Indexed catalogue keyed on the ``update_hospitals.make_key`` merge key."""
+
+  def __init__(self, path: pathlib.Path | str = ":memory:", alias_keys: Optional[AliasKeys] = None) -> None:
+    self.path = path
+    self.alias_keys = alias_keys
+    self.conn = sqlite3.connect(str(path))
+    self.conn.execute("PRAGMA journal_mode=WAL")
+    self.conn.execute("PRAGMA synchronous=NORMAL")
+    self.conn.executescript(SCHEMA)
+    if alias_keys is not None and self.get_meta("aliases") != "indexed":
+      # New store, or one last written without alias keys: index every row once.
+      with self.conn:
+        self.conn.execute("DELETE FROM facility_aliases")
+        for seq, key, payload in self.conn.execute("SELECT seq, merge_key, payload FROM facilities").fetchall():
+          self._index_aliases(seq, key, json.loads(payload))
+        self.set_meta("aliases", "indexed")
+
+  def close(self) -> None:
+    self.conn.close()
+
+  def __enter__(self) -> "CatalogueStore":
+    return self
+
+  def __exit__(self, *exc: object) -> None:
+    self.close()
+
+  def __len__(self) -> int:
+    return self.conn.execute("SELECT COUNT(*) FROM facilities").fetchone()[0]
+
+  def __contains__(self, key: object) -> bool:
+    return self.conn.execute("SELECT 1 FROM facilities WHERE merge_key = ?", (key,)).fetchone() is not None
+
+  def get_meta(self, name: str) -> Optional[str]:
+    row = self.conn.execute("SELECT value FROM store_meta WHERE name = ?", (name,)).fetchone()
+    return row[0] if row else None
+
+  def set_meta(self, name: str, value: Optional[str]) -> None:
+    with self.conn:
+      self.conn.execute("INSERT OR REPLACE INTO store_meta (name, value) VALUES (?, ?)", (name, value))
+
+  def transaction(self) -> sqlite3.Connection:
+    """Context manager committing the :meth:`put` calls made inside it as one transaction."""
+
+    return self.conn
+
+  def upsert_many(self, items: Iterable[Tuple[str, Hospital]], batch_size: int = 1000) -> int:
+    """Insert or replace ``(merge_key, record)`` pairs, one transaction per batch."""
+
+    written = 0
+    batch: List[Tuple[str, Hospital]] = []
+    for item in items:
+      batch.append(item)
+      if len(batch) >= batch_size:
+        written += self._write_batch(batch)
+        batch = []
+    if batch:
+      written += self._write_batch(batch)
+    return written
+
+  def _write_batch(self, batch: List[Tuple[str, Hospital]]) -> int:
+    with self.conn:
+      for key, record in batch:
+        self.put(key, record)
+    return len(batch)
+
+  def put(self, key: str, record: Hospital, previous: Optional[Hospital] = None) -> None:
+    """Insert or replace one record; call inside :meth:`transaction` (or ``upsert_many``).
+
+    ``previous`` is the stored version being replaced, if the caller has it;
+    the service and alias rows are then only rewritten when they changed.
+    """
+
+    seq = self.conn.execute(
+      UPSERT_SQL,
+      (
+        key,
+        _column(record, "id"),
+        _column(record, "name"),
+        _column(record, "province"),
+        _column(record, "district"),
+        _column(record, "facility_type"),
+        _column(record, "tier"),
+        json.dumps(record, ensure_ascii=False),
+      ),
+    ).fetchone()[0]
+    services = _services(record)
+    if previous is None or services != _services(previous):
+      self.conn.execute("DELETE FROM facility_services WHERE seq = ?", (seq,))
+      self.conn.executemany(
+        "INSERT INTO facility_services (service, seq) VALUES (?, ?)",
+        [(service, seq) for service in services],
+      )
+    if self.alias_keys is None:
+      self.conn.execute("DELETE FROM facility_aliases WHERE seq = ?", (seq,))
+      if self.get_meta("aliases") is not None:
+        # Written without alias keys: the next store opened with them re-indexes.
+        self.conn.execute("DELETE FROM store_meta WHERE name = 'aliases'")
+    elif previous is None or self._aliases(key, record) != self._aliases(key, previous):
+      self.conn.execute("DELETE FROM facility_aliases WHERE seq = ?", (seq,))
+      self._index_aliases(seq, key, record)
+
+  def _aliases(self, key: str, record: Hospital) -> set:
+    return {alias for alias in self.alias_keys(record) if alias != key}
+
+  def _index_aliases(self, seq: int, key: str, record: Hospital) -> None:
+    self.conn.executemany(
+      "INSERT OR IGNORE INTO facility_aliases (alias, seq) VALUES (?, ?)",
+      [(alias, seq) for alias in self._aliases(key, record)],
+    )
+
+  def delete_many(self, keys: Iterable[str]) -> int:
+    removed = 0
+    with self.conn:
+      for key in keys:
+        self.conn.execute("DELETE FROM facility_services WHERE seq IN (SELECT seq FROM facilities WHERE merge_key = ?)", (key,))
+        self.conn.execute("DELETE FROM facility_aliases WHERE seq IN (SELECT seq FROM facilities WHERE merge_key = ?)", (key,))
+        removed += self.conn.execute("DELETE FROM facilities WHERE merge_key = ?", (key,)).rowcount
+    return removed
+
+  def clear(self) -> None:
+    with self.conn:
+      self.conn.execute("DELETE FROM facility_services")
+      self.conn.execute("DELETE FROM facility_aliases")
+      self.conn.execute("DELETE FROM facilities")
+
+  def reconcile(self, items: Iterable[Tuple[str, Hospital]], batch_size: int = 1000) -> Dict[str, int]:
+    """Make the store hold exactly ``items``, in their order; return row counts per change.
+
+    ``data/hospitals.json`` stays the published catalogue and is also written
+    by the JSON merge, ``watch.py`` and hand edits, so the store is brought in
+    line with it before a merge whenever the file changed since the store
+    last exported it. Like the JSON merge, a later record with
+    a duplicate merge key replaces the earlier one. Rows are added, updated or
+    removed in place while the stored order still matches; otherwise the
+    table is reloaded.
+    """
+
+    wanted = dict(items)
+    stored = dict(self.iter_items())
+    kept = [key for key in stored if key in wanted]
+    counts = {"added": 0, "updated": 0, "removed": 0, "reloaded": 0}
+    if list(wanted)[:len(kept)] != kept:
+      self.clear()
+      counts["reloaded"] = self.upsert_many(wanted.items(), batch_size=batch_size)
+      return counts
+
+    counts["removed"] = self.delete_many(key for key in stored if key not in wanted)
+    changed = [(key, record) for key, record in wanted.items() if key in stored and stored[key] != record]
+    added = [(key, record) for key, record in wanted.items() if key not in stored]
+    counts["updated"] = self.upsert_many(changed, batch_size=batch_size)
+    counts["added"] = self.upsert_many(added, batch_size=batch_size)
+    return counts
+
+  def get_many(self, keys: Iterable[str]) -> Dict[str, Hospital]:
+    """Fetch records for the given merge keys in chunked indexed lookups."""
+
+    unique = list(dict.fromkeys(keys))
+    found: Dict[str, Hospital] = {}
+    for start in range(0, len(unique), LOOKUP_CHUNK):
+      chunk = unique[start:start + LOOKUP_CHUNK]
+      placeholders = ",".join("?" * len(chunk))
+      rows = self.conn.execute(
+        f"SELECT merge_key, payload FROM facilities WHERE merge_key IN ({placeholders})",
+        chunk,
+      )
+      for key, payload in rows:
+        found[key] = json.loads(payload)
+    return found
+
+  def get(self, key: str) -> Optional[Hospital]:
+    row = self.conn.execute("SELECT payload FROM facilities WHERE merge_key = ?", (key,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+  def keys_for_id(self, facility_id: str) -> List[str]:
+    """Merge keys of the records carrying ``facility_id``, in catalogue order."""
+
+    rows = self.conn.execute("SELECT merge_key FROM facilities WHERE id = ? ORDER BY seq", (facility_id,))
+    return [key for (key,) in rows]
+
+  def keys_for_alias(self, alias: str) -> List[str]:
+    """Merge keys of the records listing ``alias`` among their alias keys, in catalogue order."""
+
+    rows = self.conn.execute(
+      "SELECT f.merge_key FROM facility_aliases a JOIN facilities f ON f.seq = a.seq WHERE a.alias = ? ORDER BY f.seq",
+      (alias,),
+    )
+    return [key for (key,) in rows]
+
+  def shared_lookup_keys(self) -> List[Tuple[str, str, str, str]]:
+    """Ids and aliases claimed by more than one record, as ``(kind, value, first, second)``.
+
+    An alias that is another record's merge key counts as shared too. These
+    are the values a merge cannot match on; only indexed columns are read.
+    """
+
+    queries = [
+      ("id", """
+        SELECT id, merge_key FROM facilities
+        WHERE id IN (SELECT id FROM facilities WHERE id IS NOT NULL GROUP BY id HAVING COUNT(*) > 1)
+        ORDER BY id, seq
+      """),
+      ("alias", """
+        SELECT a.alias, f.merge_key FROM facility_aliases a JOIN facilities f ON f.seq = a.seq
+        WHERE a.alias IN (SELECT alias FROM facility_aliases GROUP BY alias HAVING COUNT(*) > 1)
+          OR a.alias IN (SELECT merge_key FROM facilities)
+        ORDER BY a.alias, f.seq
+      """),
+    ]
+    shared: List[Tuple[str, str, str, str]] = []
+    for kind, sql in queries:
+      owners: Dict[str, List[str]] = {}
+      for value, key in self.conn.execute(sql):
+        owners.setdefault(value, []).append(key)
+      for value, keys in owners.items():
+        if kind == "alias" and value in self:
+          keys = [value, *keys]
+        if len(keys) > 1:
+          shared.append((kind, value, keys[0], keys[1]))
+    return shared
+
+  def get_by_id(self, facility_id: str) -> Optional[Hospital]:
+    row = self.conn.execute("SELECT payload FROM facilities WHERE id = ? ORDER BY seq LIMIT 1", (facility_id,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+  def query(
+    self,
+    province: Optional[str] = None,
+    district: Optional[str] = None,
+    facility_type: Optional[str] = None,
+    tier: Optional[str] = None,
+    service: Optional[str] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+  ) -> List[Hospital]:
+    """Return records matching every provided filter, in catalogue order."""
+
+    clauses: List[str] = []
+    params: List[Any] = []
+    for column, value in [
+      ("province", province),
+      ("district", district),
+      ("facility_type", facility_type),
+      ("tier", tier),
+    ]:
+      if value is not None:
+        clauses.append(f"f.{column} = ?")
+        params.append(value)
+    if service is not None:
+      clauses.append("f.seq IN (SELECT seq FROM facility_services WHERE service = ?)")
+      params.append(service)
+
+    sql = "SELECT f.payload FROM facilities f"
+    if clauses:
+      sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY f.seq"
+    if limit is not None:
+      sql += " LIMIT ? OFFSET ?"
+      params.extend([limit, offset])
+    return [json.loads(payload) for (payload,) in self.conn.execute(sql, params)]
+
+  def iter_records(self) -> Iterator[Hospital]:
+    for (payload,) in self.conn.execute("SELECT payload FROM facilities ORDER BY seq"):
+      yield json.loads(payload)
+
+  def iter_items(self) -> Iterator[Tuple[str, Hospital]]:
+    """Yield ``(merge_key, record)`` pairs in catalogue order."""
+
+    for key, payload in self.conn.execute("SELECT merge_key, payload FROM facilities ORDER BY seq"):
+      yield key, json.loads(payload)
+
+  def export_json(self, path: pathlib.Path) -> int:
+    """Write the catalogue as JSON in the same layout as ``update_hospitals.save_json``."""
+
+    records = list(self.iter_records())
+    write_json_atomic(path, records)
+    return len(records)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""Materialised facet counts for the directory filters.
+
+The export stage writes a compact count cube next to the catalogue. The site
+loads it (``src/data/facets.json``) to show per-option counts in the filter
+dropdowns without scanning the bundle, and ``FacetCube.count`` answers the
+same questions from Python. The cube holds counts for every single facet value
+plus the common two-way combinations in ``FACET_PAIRS``; multi-valued fields
+(``services``, ``medical_aids``) count a record once per value.
+
+A merge only touches a few records, so ``update_hospitals`` hands the records
+it changed (as they were before and after the merge) to
+``refresh_facet_cube``, which patches the saved cube instead of rescanning
+the catalogue. The cube records the digest of the catalogue file it counts;
+if the catalogue was edited since (by hand, or by a path that does not report
+changes), the digests differ and the cube is rebuilt in one pass.
+"""
+
+from __future__ import annotations
+
+import json
+import pathlib
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from atomic_io import write_json_atomic
+
+Hospital = Dict[str, Any]
+
+CUBE_VERSION = 1
+FACET_FIELDS = ["province", "facility_type", "ownership", "services", "tier", "open_24h", "medical_aids"]
+FACET_PAIRS: List[Tuple[str, str]] = [
+  ("province", "facility_type"),
+  ("province", "ownership"),
+  ("province", "services"),
+  ("province", "tier"),
+  ("province", "open_24h"),
+  ("facility_type", "services"),
+  ("facility_type", "tier"),
+  ("facility_type", "open_24h"),
+  ("facility_type", "medical_aids"),
+  ("services", "open_24h"),
+]
+BOOLEAN_FACETS = {"open_24h"}
+FALSE_STRINGS = {"", "false", "0", "no", "n", "off", "none"}
+TRUE_STRINGS = {"true", "1", "yes", "y", "on"}
+
+Signature = Tuple[Tuple[str, ...], ...]
+Change = Tuple[Optional[Hospital], Hospital]
+
+
+def boolean_bucket(raw: Any) -> str:
+  """``"true"``/``"false"`` for a boolean facet; strings such as ``"false"`` or ``"No"`` count as false."""
+
+  if isinstance(raw, str):
+    return "false" if raw.strip().lower() in FALSE_STRINGS else "true"
+  return "true" if raw else "false"
+
+
+def facet_values(record: Hospital, field: str) -> Tuple[str, ...]:
+  raw = record.get(field)
+  if field in BOOLEAN_FACETS:
+    return (boolean_bucket(raw),)
+  if isinstance(raw, list):
+    return tuple(sorted({str(item).strip() for item in raw if str(item).strip()}))
+  if raw in (None, ""):
+    return ()
+  return (str(raw).strip(),)
+
+
+def facet_signature(record: Hospital) -> Signature:
+  """The facet values of a record; two records with equal signatures count identically."""
+  return tuple(facet_values(record, field) for field in FACET_FIELDS)
+
+
+class FacetCube:
+  """Single-facet and pairwise counts over a set of records."""
+
+  def __init__(self) -> None:
+    self.total = 0
+    self.catalogue: Optional[str] = None
+    self.single: Dict[str, Counter] = {field: Counter() for field in FACET_FIELDS}
+    self.pairs: Dict[Tuple[str, str], Counter] = {pair: Counter() for pair in FACET_PAIRS}
+
+  @classmethod
+  def from_records(cls, records: Iterable[Hospital]) -> "FacetCube":
+    cube = cls()
+    for record in records:
+      cube.apply(facet_signature(record), 1)
+    return cube
+
+  def update(self, before: Optional[Hospital], after: Optional[Hospital]) -> None:
+    """Replace one record's contribution; ``before`` is None for an added record, ``after`` for a removed one."""
+
+    old = facet_signature(before) if before is not None else None
+    new = facet_signature(after) if after is not None else None
+    if old == new:
+      return
+    if old is not None:
+      self.apply(old, -1)
+    if new is not None:
+      self.apply(new, 1)
+
+  def apply(self, signature: Signature, sign: int) -> None:
+    """Add (``sign=1``) or remove (``sign=-1``) one record's contribution."""
+
+    values = dict(zip(FACET_FIELDS, signature))
+    self.total += sign
+    for field in FACET_FIELDS:
+      counter = self.single[field]
+      for value in values[field]:
+        counter[value] += sign
+        if counter[value] <= 0:
+          del counter[value]
+    for first, second in FACET_PAIRS:
+      counter = self.pairs[(first, second)]
+      for left in values[first]:
+        for right in values[second]:
+          counter[(left, right)] += sign
+          if counter[(left, right)] <= 0:
+            del counter[(left, right)]
+
+  def count(self, **filters: Any) -> int:
+    """Count records matching up to two facet filters, e.g. ``count(province="Harare")``.
+
+    Filter values are bucketed like record values, so ``open_24h="false"``
+    and ``open_24h=False`` count the same records.
+    """
+
+    items: List[Tuple[str, str]] = []
+    for field, value in filters.items():
+      if field not in FACET_FIELDS:
+        raise KeyError(f"{field} is not a materialised facet")
+      values = facet_values({field: value}, field)
+      items.append((field, values[0] if values else ""))
+    if not items:
+      return self.total
+    if len(items) == 1:
+      field, value = items[0]
+      return self.single[field].get(value, 0)
+    if len(items) == 2:
+      (first, left), (second, right) = items
+      if (first, second) in self.pairs:
+        return self.pairs[(first, second)].get((left, right), 0)
+      if (second, first) in self.pairs:
+        return self.pairs[(second, first)].get((right, left), 0)
+    raise KeyError(f"No materialised combination for {', '.join(field for field, _ in items)}")
+
+  def to_json(self) -> Dict[str, Any]:
+    pairs: Dict[str, Dict[str, Dict[str, int]]] = {}
+    for (first, second), counter in self.pairs.items():
+      nested: Dict[str, Dict[str, int]] = {}
+      for (left, right), value in sorted(counter.items()):
+        nested.setdefault(left, {})[right] = value
+      pairs[f"{first}|{second}"] = nested
+    return {
+      "version": CUBE_VERSION,
+      "catalogue": self.catalogue,
+      "total": self.total,
+      "facets": {field: dict(sorted(counter.items())) for field, counter in self.single.items()},
+      "pairs": pairs,
+    }
+
+  @classmethod
+  def from_json(cls, payload: Dict[str, Any]) -> Optional["FacetCube"]:
+    """Rebuild a cube from :meth:`to_json` output; ``None`` when the layout is stale."""
+
+    if payload.get("version") != CUBE_VERSION:
+      return None
+    if set(payload.get("facets", {})) != set(FACET_FIELDS):
+      return None
+    if set(payload.get("pairs", {})) != {f"{a}|{b}" for a, b in FACET_PAIRS}:
+      return None
+    cube = cls()
+    cube.catalogue = payload.get("catalogue")
+    cube.total = int(payload.get("total", 0))
+    for field, counts in payload["facets"].items():
+      cube.single[field] = Counter(counts)
+    for name, nested in payload["pairs"].items():
+      first, second = name.split("|")
+      counter: Counter = Counter()
+      for left, rights in nested.items():
+        for right, value in rights.items():
+          counter[(left, right)] = value
+      cube.pairs[(first, second)] = counter
+    return cube
+
+
+def load_facet_cube(path: pathlib.Path) -> Optional[FacetCube]:
+  if not path.exists():
+    return None
+  try:
+    return FacetCube.from_json(json.loads(path.read_text()))
+  except ValueError:
+    return None
+
+
+def refresh_facet_cube(
+  path: pathlib.Path,
+  records: Iterable[Hospital],
+  changes: Optional[Iterable[Change]] = None,
+  basis: Optional[str] = None,
+  catalogue: Optional[str] = None,
+) -> FacetCube:
+  """Write the facet cube for the catalogue ``records`` to ``path``.
+
+  With ``changes`` (``(before, after)`` pairs, ``before`` None for added
+  records) the cube saved at ``path`` is patched instead, provided it counts
+  the catalogue whose digest is ``basis``; ``records`` is then never read.
+  ``catalogue`` is the digest of the catalogue counted now.
+  """
+
+  cube = load_facet_cube(path) if changes is not None and basis is not None else None
+  if cube is not None and cube.catalogue == basis:
+    for before, after in changes:
+      cube.update(before, after)
+  else:
+    cube = FacetCube.from_records(records)
+  cube.catalogue = catalogue
+  write_json_atomic(path, cube.to_json())
+  return cube
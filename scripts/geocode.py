@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""Offline batch geocoder for facilities without coordinates.
+
+No live geocoding service is reachable from CI, so the gazetteer is built from
+the catalogue itself: every facility that already has ``lat``/``lon``
+contributes to centroids for its city, district and province. Records missing
+coordinates then get the most precise centroid available in one pass.
+``update_hospitals`` runs this over the whole merged catalogue after every
+merge, so new scrapes and existing records are filled from the same centroids.
+
+Centroids are approximations, so they are kept out of ``lat``/``lon``: they go
+to ``approx_lat``/``approx_lon`` with ``geo_precision`` (``city``, ``district``
+or ``province``). Map pins, directions and JSON-LD keep using exact
+coordinates only, the proximity sort falls back to the approximation and says
+so, and a real coordinate arriving in a later merge simply fills ``lat``/``lon``
+(the approximation is dropped on the next fill).
+
+Lookups are hash hits on normalised names; a close-match fallback within the
+same province catches spelling variants such as "Chitungwisa".
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from difflib import get_close_matches
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+Hospital = Dict[str, Any]
+Coordinates = Tuple[float, float]
+
+PRECISION_LEVELS = ["city", "district", "province"]
+APPROX_FIELDS = ("approx_lat", "approx_lon", "geo_precision")
+FUZZY_CUTOFF = 0.85
+
+
+def normalize_place(value: Any) -> str:
+  return re.sub(r"[^a-z0-9]+", " ", str(value or "").lower()).strip()
+
+
+def coordinates(record: Hospital) -> Optional[Coordinates]:
+  try:
+    lat = float(record.get("lat"))
+    lon = float(record.get("lon"))
+  except (TypeError, ValueError):
+    return None
+  if lat == 0 and lon == 0:
+    return None
+  return lat, lon
+
+
+class Gazetteer:
+  """Centroids per (province, city), (province, district) and province."""
+
+  def __init__(self) -> None:
+    self._sums: Dict[Tuple[str, str, str], List[float]] = {}
+    self.centroids: Dict[Tuple[str, str, str], Coordinates] = {}
+    self._names: Dict[Tuple[str, str], List[str]] = {}
+    self._fuzzy: Dict[Tuple[str, str, str], Optional[str]] = {}
+
+  @classmethod
+  def from_records(cls, records: Iterable[Hospital]) -> "Gazetteer":
+    gazetteer = cls()
+    for record in records:
+      point = coordinates(record)
+      if point is not None:
+        gazetteer.add(record, point)
+    gazetteer.finalize()
+    return gazetteer
+
+  def add(self, record: Hospital, point: Coordinates) -> None:
+    province = normalize_place(record.get("province"))
+    for level, place in self._places(record):
+      key = (level, province, place)
+      sums = self._sums.setdefault(key, [0.0, 0.0, 0])
+      sums[0] += point[0]
+      sums[1] += point[1]
+      sums[2] += 1
+
+  def finalize(self) -> None:
+    self.centroids = {key: (lat / count, lon / count) for key, (lat, lon, count) in self._sums.items()}
+    self._names = {}
+    self._fuzzy = {}
+    for level, province, place in self.centroids:
+      self._names.setdefault((level, province), []).append(place)
+
+  def lookup(self, record: Hospital) -> Optional[Tuple[Coordinates, str]]:
+    """Return the most precise centroid for ``record`` and its precision level."""
+
+    province = normalize_place(record.get("province"))
+    for level, place in self._places(record):
+      hit = self.centroids.get((level, province, place))
+      if hit is None and level != "province":
+        match = self._close_match(level, province, place)
+        if match is not None:
+          hit = self.centroids[(level, province, match)]
+      if hit is not None:
+        return hit, level
+    return None
+
+  def _close_match(self, level: str, province: str, place: str) -> Optional[str]:
+    key = (level, province, place)
+    if key not in self._fuzzy:
+      candidates = get_close_matches(place, self._names.get((level, province), []), n=1, cutoff=FUZZY_CUTOFF)
+      self._fuzzy[key] = candidates[0] if candidates else None
+    return self._fuzzy[key]
+
+  @staticmethod
+  def _places(record: Hospital) -> List[Tuple[str, str]]:
+    places: List[Tuple[str, str]] = []
+    for level in PRECISION_LEVELS:
+      place = normalize_place(record.get(level))
+      if place:
+        places.append((level, place))
+    return places
+
+
+def clear_approximation(record: Hospital) -> None:
+  for field in APPROX_FIELDS:
+    record.pop(field, None)
+
+
+def fill_missing_coordinates(records: List[Hospital], gazetteer: Optional[Gazetteer] = None) -> Counter:
+  """Set ``approx_lat``/``approx_lon``/``geo_precision`` in place for records without coordinates.
+
+  Records with exact coordinates lose any stale approximation. Returns counts
+  of filled records per precision level (plus ``unresolved``).
+  """
+
+  gazetteer = gazetteer or Gazetteer.from_records(records)
+  filled: Counter = Counter()
+  for record in records:
+    if coordinates(record) is not None:
+      clear_approximation(record)
+      continue
+    found = gazetteer.lookup(record)
+    if found is None:
+      clear_approximation(record)
+      filled["unresolved"] += 1
+      continue
+    (lat, lon), level = found
+    record["approx_lat"] = round(lat, 5)
+    record["approx_lon"] = round(lon, 5)
+    record["geo_precision"] = level
+    filled[level] += 1
+  return filled
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""Persistent registry that keeps facility ids stable across pipeline runs.
+
+``map_to_schema`` proposes an id from ``slugify(name, district)``, so fixing a
+spelling or losing a name changes the id and breaks bookmarks, frontend caches
+and diffs. The registry remembers which identity keys (the dedup key of the
+canonical name plus one per alias, see ``scrape_hospitals.identity_keys``)
+were given which id:
+
+- a record whose keys are already known gets its registered id back;
+- an unknown record gets its proposed id. If that id is registered to a
+  facility not seen in this run it is taken over (the slug is name plus
+  district, so this is the same facility after e.g. a province fix). If
+  another record in the same run already took it, the collision is reported
+  and a numbered variant is issued;
+- every key a record carries is remembered under its final id, so an old
+  spelling that survives as an alias keeps the id after the canonical name
+  changes.
+
+The registry is stored as ``data/id_registry.json`` (``{id: [keys...]}``) and
+never drops ids, so a facility that disappears for a run gets its id back
+when it returns.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import pathlib
+from collections import Counter
+from typing import Dict, List, Optional, Set, Tuple
+
+from atomic_io import write_json_atomic
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+REGISTRY_PATH = ROOT / "data" / "id_registry.json"
+REGISTRY_VERSION = 1
+
+
+class IdRegistry:
+  """Hash maps from identity key to id and from id to its keys."""
+
+  def __init__(self, path: Optional[pathlib.Path] = REGISTRY_PATH) -> None:
+    self.path = path
+    self.by_key: Dict[str, str] = {}
+    self.keys_by_id: Dict[str, Set[str]] = {}
+    self.collisions: List[Tuple[str, str, str]] = []
+    self._claimed: Set[str] = set()
+
+  @classmethod
+  def load(cls, path: pathlib.Path = REGISTRY_PATH) -> "IdRegistry":
+    registry = cls(path)
+    if path.exists():
+      payload = json.loads(path.read_text())
+      if payload.get("version") != REGISTRY_VERSION:
+        raise ValueError(f"{path} has registry version {payload.get('version')!r}, expected {REGISTRY_VERSION}")
+      for facility_id, keys in payload.get("ids", {}).items():
+        registry._remember(facility_id, keys)
+    return registry
+
+  def payload(self) -> Dict[str, object]:
+    return {
+      "version": REGISTRY_VERSION,
+      "ids": {facility_id: sorted(keys) for facility_id, keys in sorted(self.keys_by_id.items())},
+    }
+
+  def digest(self) -> str:
+    """Digest of the registered ids and keys, for artifacts whose ids came from them."""
+
+    return hashlib.sha1(json.dumps(self.payload(), sort_keys=True).encode("utf-8")).hexdigest()
+
+  def save(self, path: Optional[pathlib.Path] = None) -> None:
+    write_json_atomic(path or self.path, self.payload())
+
+  def start_run(self) -> None:
+    """Forget which ids were handed out in the previous run (the registry itself is kept)."""
+
+    self._claimed = set()
+    self.collisions = []
+
+  def assign(self, keys: List[str], proposed: str) -> Tuple[str, str]:
+    """Return the id for a record with identity ``keys`` and how it was chosen.
+
+    Registered ids of the keys are tried first (the canonical name's before
+    those reached through aliases), then ``proposed``. An id already handed
+    out earlier in this run is a collision: it is recorded in ``collisions``
+    and, when no candidate is left, a numbered variant is issued. The outcome
+    is ``reused``, ``new`` or ``collision``.
+    """
+
+    known = list(dict.fromkeys(self.by_key[key] for key in keys if key in self.by_key))
+    identity = keys[0] if keys else proposed
+    for candidate in [*known, proposed]:
+      if candidate not in self._claimed:
+        outcome = "reused" if candidate in self.keys_by_id else "new"
+        break
+      if candidate in known:
+        self.collisions.append((candidate, identity, "claimed earlier in this run"))
+    else:
+      candidate, outcome = self._variant(proposed), "collision"
+      self.collisions.append((candidate, identity, f"{proposed} already taken"))
+
+    self._claimed.add(candidate)
+    self._remember(candidate, keys)
+    return candidate, outcome
+
+  def _variant(self, base: str) -> str:
+    suffix = 2
+    while f"{base}-{suffix}" in self.keys_by_id or f"{base}-{suffix}" in self._claimed:
+      suffix += 1
+    return f"{base}-{suffix}"
+
+  def _remember(self, facility_id: str, keys: List[str]) -> None:
+    owned = self.keys_by_id.setdefault(facility_id, set())
+    for key in keys:
+      previous = self.by_key.get(key)
+      if previous is not None and previous != facility_id:
+        # The key now belongs to this id (e.g. two facilities were merged); drop the stale mapping.
+        self.keys_by_id[previous].discard(key)
+      self.by_key[key] = facility_id
+      owned.add(key)
+
+
+def assign_ids(registry: IdRegistry, records: List[Tuple[List[str], Dict]]) -> Counter:
+  """Set ``record["id"]`` for each ``(keys, record)`` pair; return counts per outcome."""
+
+  registry.start_run()
+  outcomes: Counter = Counter()
+  for keys, record in records:
+    record["id"], outcome = registry.assign(keys, record["id"])
+    outcomes[outcome] += 1
+  return outcomes
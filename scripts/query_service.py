@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""Read-only local HTTP query service over the mapped catalogue.
+
+The catalogue is loaded once at startup and indexed per filterable field, so a
+query is a handful of set intersections instead of a scan. Responses carry an
+ETag derived from the catalogue version and the normalised query; matching
+``If-None-Match`` requests get ``304 Not Modified`` and rendered bodies are
+kept in a small LRU cache.
+
+Endpoints::
+
+  GET /facilities?province=Harare&services=ICU&page=2&per_page=20
+  GET /facilities?province=Harare&province=Bulawayo
+  GET /facilities/<id>
+
+Different filters must all match; repeating a filter matches any of its
+values. ``open_24h`` and ``verified`` take the same true/false spellings as
+the facet cube (``true``/``1``/``yes``, ``false``/``0``/``no``, ...); other
+values are rejected. ``page`` and ``per_page`` may be given once.
+
+Run with ``python scripts/query_service.py --port 8080``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import pathlib
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl, unquote, urlsplit
+
+from facets import FALSE_STRINGS, TRUE_STRINGS, boolean_bucket
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+CATALOGUE_PATH = ROOT / "data" / "hospitals.json"
+
+Hospital = Dict[str, Any]
+Filters = Dict[str, List[str]]
+
+FILTER_FIELDS = ["province", "district", "facility_type", "services", "open_24h", "tier", "verified"]
+BOOLEAN_FIELDS = {"open_24h", "verified"}
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 500
+CACHE_CONTROL = "public, max-age=300"
+
+
+class QueryError(ValueError):
+  """Raised for malformed query parameters (surfaced as HTTP 400)."""
+
+
+def index_value(value: Any) -> str:
+  if isinstance(value, bool):
+    return "true" if value else "false"
+  return " ".join(str(value).strip().lower().split())
+
+
+class CatalogueIndex:
+  """In-memory catalogue with one inverted index per filter field."""
+
+  def __init__(self, records: List[Hospital], version: str) -> None:
+    self.records = records
+    self.version = version
+    self.by_id: Dict[str, int] = {}
+    self.indexes: Dict[str, Dict[str, FrozenSet[int]]] = {}
+    building: Dict[str, Dict[str, set]] = {field: {} for field in FILTER_FIELDS}
+    for position, record in enumerate(records):
+      if record.get("id"):
+        self.by_id.setdefault(str(record["id"]), position)
+      for field in FILTER_FIELDS:
+        raw = record.get(field)
+        if field in BOOLEAN_FIELDS:
+          values = [boolean_bucket(raw)]
+        elif isinstance(raw, list):
+          values = raw
+        else:
+          values = [raw]
+        for value in values:
+          if value in (None, ""):
+            continue
+          building[field].setdefault(index_value(value), set()).add(position)
+    for field, postings in building.items():
+      self.indexes[field] = {value: frozenset(positions) for value, positions in postings.items()}
+
+  @classmethod
+  def from_path(cls, path: pathlib.Path) -> "CatalogueIndex":
+    raw = path.read_bytes()
+    return cls(json.loads(raw), hashlib.sha1(raw).hexdigest())
+
+  def match(self, filters: Dict[str, Union[str, List[str]]]) -> List[int]:
+    """Return catalogue positions matching every filter (any of a filter's values), in catalogue order."""
+
+    postings: List[FrozenSet[int]] = []
+    for field, values in filters.items():
+      index = self.indexes[field]
+      if isinstance(values, str):
+        postings.append(index.get(index_value(values), frozenset()))
+      else:
+        postings.append(frozenset().union(*(index.get(index_value(value), frozenset()) for value in values)))
+    if not postings:
+      return list(range(len(self.records)))
+    postings.sort(key=len)
+    result = set(postings[0])
+    for posting in postings[1:]:
+      result &= posting
+      if not result:
+        break
+    return sorted(result)
+
+
+def parse_query(query: str) -> Tuple[Filters, int, int]:
+  """Split a query string into filters and pagination; raise QueryError when invalid.
+
+  Each filter maps to the sorted, de-duplicated values it was given.
+  """
+
+  filters: Filters = {}
+  paging: Dict[str, int] = {}
+  for key, value in parse_qsl(query, keep_blank_values=False):
+    if key in {"page", "per_page"}:
+      if key in paging:
+        raise QueryError(f"{key} may only be given once")
+      paging[key] = _positive_int(key, value)
+    elif key in BOOLEAN_FIELDS:
+      filters.setdefault(key, []).append(_boolean(key, value))
+    elif key in FILTER_FIELDS:
+      filters.setdefault(key, []).append(value)
+    else:
+      raise QueryError(f"Unknown parameter: {key}")
+  filters = {key: sorted(set(values)) for key, values in filters.items()}
+  return filters, paging.get("page", 1), min(paging.get("per_page", DEFAULT_PER_PAGE), MAX_PER_PAGE)
+
+
+def _boolean(key: str, value: str) -> str:
+  if value.strip().lower() not in TRUE_STRINGS | FALSE_STRINGS:
+    raise QueryError(f"{key} must be true or false")
+  return boolean_bucket(value)
+
+
+def _positive_int(key: str, value: str) -> int:
+  try:
+    number = int(value)
+  except ValueError:
+    raise QueryError(f"{key} must be an integer") from None
+  if number < 1:
+    raise QueryError(f"{key} must be >= 1")
+  return number
+
+
+class QueryService:
+  """Resolves requests against a :class:`CatalogueIndex` with an LRU response cache."""
+
+  def __init__(self, index: CatalogueIndex, cache_size: int = 512) -> None:
+    self.index = index
+    self.cache_size = cache_size
+    self._cache: "OrderedDict[str, bytes]" = OrderedDict()
+    self._lock = threading.Lock()
+
+  def etag(self, cache_key: str) -> str:
+    digest = hashlib.sha1(f"{self.index.version}:{cache_key}".encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+  def list_facilities(self, query: str) -> Tuple[str, bytes]:
+    filters, page, per_page = parse_query(query)
+    cache_key = json.dumps([sorted(filters.items()), page, per_page])
+    body = self._cached(cache_key)
+    if body is None:
+      positions = self.index.match(filters)
+      start = (page - 1) * per_page
+      payload = {
+        "total": len(positions),
+        "page": page,
+        "per_page": per_page,
+        "results": [self.index.records[pos] for pos in positions[start:start + per_page]],
+      }
+      body = self._store(cache_key, json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+    return self.etag(cache_key), body
+
+  def get_facility(self, facility_id: str) -> Optional[Tuple[str, bytes]]:
+    position = self.index.by_id.get(facility_id)
+    if position is None:
+      return None
+    cache_key = f"id:{facility_id}"
+    body = self._cached(cache_key)
+    if body is None:
+      body = self._store(cache_key, json.dumps(self.index.records[position], ensure_ascii=False).encode("utf-8"))
+    return self.etag(cache_key), body
+
+  def _cached(self, key: str) -> Optional[bytes]:
+    with self._lock:
+      body = self._cache.get(key)
+      if body is not None:
+        self._cache.move_to_end(key)
+      return body
+
+  def _store(self, key: str, body: bytes) -> bytes:
+    with self._lock:
+      self._cache[key] = body
+      if len(self._cache) > self.cache_size:
+        self._cache.popitem(last=False)
+    return body
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+  protocol_version = "HTTP/1.1"
+  disable_nagle_algorithm = True
+  service: QueryService
+
+  def do_GET(self) -> None:  # noqa: N802 - http.server naming
+    parts = urlsplit(self.path)
+    path = parts.path.rstrip("/")
+    try:
+      if path == "/facilities":
+        etag, body = self.service.list_facilities(parts.query)
+      elif path.startswith("/facilities/"):
+        found = self.service.get_facility(unquote(path[len("/facilities/"):]))
+        if found is None:
+          self._send_json(404, {"error": "Facility not found"})
+          return
+        etag, body = found
+      else:
+        self._send_json(404, {"error": "Not found"})
+        return
+    except QueryError as exc:
+      self._send_json(400, {"error": str(exc)})
+      return
+
+    if etag in {tag.strip() for tag in self.headers.get("If-None-Match", "").split(",")}:
+      self.send_response(304)
+      self.send_header("ETag", etag)
+      self.send_header("Cache-Control", CACHE_CONTROL)
+      self.end_headers()
+      return
+    self._send_body(200, body, etag)
+
+  def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+    self._send_body(status, json.dumps(payload).encode("utf-8"))
+
+  def _send_body(self, status: int, body: bytes, etag: Optional[str] = None) -> None:
+    self.send_response(status)
+    self.send_header("Content-Type", "application/json; charset=utf-8")
+    self.send_header("Content-Length", str(len(body)))
+    if etag:
+      self.send_header("ETag", etag)
+      self.send_header("Cache-Control", CACHE_CONTROL)
+    self.end_headers()
+    self.wfile.write(body)
+
+  def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - signature from base class
+    if not getattr(self.server, "quiet", False):
+      super().log_message(format, *args)
+
+
+def make_server(index: CatalogueIndex, host: str = "127.0.0.1", port: int = 8080, quiet: bool = False) -> ThreadingHTTPServer:
+  handler = type("BoundQueryHandler", (QueryHandler,), {"service": QueryService(index)})
+  server = ThreadingHTTPServer((host, port), handler)
+  server.daemon_threads = True
+  server.quiet = quiet  # type: ignore[attr-defined]
+  return server
+
+
+def main(argv: List[str] | None = None) -> None:
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--catalogue", type=pathlib.Path, default=CATALOGUE_PATH)
+  parser.add_argument("--host", default="127.0.0.1")
+  parser.add_argument("--port", type=int, default=8080)
+  parser.add_argument("--quiet", action="store_true", help="Suppress per-request logging")
+  args = parser.parse_args(argv)
+
+  index = CatalogueIndex.from_path(args.catalogue)
+  server = make_server(index, args.host, args.port, args.quiet)
+  print(f"Serving {len(index.records)} facilities on http://{args.host}:{server.server_port}/facilities")
+  try:
+    server.serve_forever()
+  except KeyboardInterrupt:
+    pass
+  finally:
+    server.server_close()
+
+
+if __name__ == "__main__":
+  main()
@@ -12,38 +12,33 @@ ML/embeddings later without changing their public signatures.
 
 from __future__ import annotations
 
+import argparse
 import csv
 import datetime as dt
+import functools
+import hashlib
+import importlib
 import importlib.util
 import json
 import pathlib
 import re
+from collections import Counter, deque
 from difflib import SequenceMatcher
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from atomic_io import atomic_open, write_json_atomic
+from facets import refresh_facet_cube
+from id_registry import REGISTRY_PATH, IdRegistry, assign_ids
+from update_hospitals import COLLISION_REPORT_LIMIT
 
 OPENPYXL_AVAILABLE = importlib.util.find_spec("openpyxl") is not None
 PDFPLUMBER_AVAILABLE = importlib.util.find_spec("pdfplumber") is not None
 XLRD_AVAILABLE = importlib.util.find_spec("xlrd") is not None
-
-if OPENPYXL_AVAILABLE:
-  import openpyxl  # type: ignore
-else:
-  openpyxl = None  # type: ignore
-
-if PDFPLUMBER_AVAILABLE:
-  import pdfplumber  # type: ignore
-else:
-  pdfplumber = None  # type: ignore
-
-if XLRD_AVAILABLE:
-  import xlrd  # type: ignore
-  from xlrd.biffh import XLRDError  # type: ignore
-else:
-  xlrd = None  # type: ignore
-  XLRDError = Exception  # type: ignore[misc,assignment]
+BS4_AVAILABLE = importlib.util.find_spec("bs4") is not None
 
 ROOT = pathlib.Path(__file__).resolve().parents[1]
 SCRAPED_OUTPUT = ROOT / "data" / "hospitals_scraped_new.json"
+SCRAPED_FACETS = ROOT / "data" / "hospitals_scraped_facets.json"
 RAW_DIR = ROOT / "data" / "raw"
 TODAY = dt.date.today().isoformat()
 REMOTE_RAW_SOURCES = {
@@ -75,6 +70,22 @@ TRUSTED_SOURCES = {
 
 Hospital = Dict[str, object]
 
+ZW_COUNTRY_CODE = "263"
+# Hosts that many unrelated facilities list as their "website".
+SHARED_DOMAINS = {
+  "facebook.com",
+  "m.facebook.com",
+  "instagram.com",
+  "twitter.com",
+  "x.com",
+  "linkedin.com",
+  "wa.me",
+  "google.com",
+  "sites.google.com",
+  "business.site",
+  "gmail.com",
+}
+
 URBAN_CENTRES = {
   "harare",
   "bulawayo",
@@ -114,7 +125,16 @@ def make_key(name: str, district: str, province: str = "") -> str:
 
 def slugify(name: str, district: str) -> str:
   slug = re.sub(r"[^a-z0-9]+", "-", f"{name}-{district}".lower()).strip("-")
-  return slug or f"facility-{int(dt.datetime.now().timestamp())}"
+  return slug or f"facility-{hashlib.sha1(f'{name}|{district}'.encode('utf-8')).hexdigest()[:10]}"
+
+
+def identity_keys(record: Hospital) -> List[str]:
+  """Dedup keys of a record's name and each alias; the id registry's notion of identity."""
+
+  district = record.get("district") or record.get("city") or ""
+  names = [record.get("name", ""), *(record.get("aliases") or [])]
+  keys = [make_key(name, district, record.get("province") or "") for name in names if normalize_text(name)]
+  return list(dict.fromkeys(keys))
 
 
 def classify_facility_type(record: Hospital) -> str:
@@ -211,10 +231,43 @@ def tier_from_record(record: Hospital) -> Optional[str]:
   return "Tier 3"
 
 
-def clean_phone(value: Optional[str]) -> Optional[str]:
+def clean_phone(value: Optional[str], e164: bool = False) -> Optional[str]:
+  """Tidy whitespace in a phone number, or normalise it to E.164 when ``e164``.
+
+  E.164 output assumes Zimbabwe (+263) for national numbers with a trunk ``0``
+  and keeps only the first number when several are listed.
+  """
+  if not value:
+    return None
+  if not e164:
+    return re.sub(r"\s+", " ", value).strip()
+
+  first = re.split(r"[/,;]|\bor\b", str(value))[0]
+  digits = re.sub(r"\D", "", first)
+  if not first.strip().startswith("+"):
+    if digits.startswith("00"):
+      digits = digits[2:]
+    elif digits.startswith("0"):
+      digits = ZW_COUNTRY_CODE + digits[1:]
+    elif not digits.startswith(ZW_COUNTRY_CODE):
+      digits = ZW_COUNTRY_CODE + digits
+  if digits.startswith(ZW_COUNTRY_CODE + "0"):
+    digits = ZW_COUNTRY_CODE + digits[len(ZW_COUNTRY_CODE) + 1:]
+  if len(digits) < 8 or len(digits) > 15:
+    return None
+  return f"+{digits}"
+
+
+def website_domain(value: Optional[str]) -> Optional[str]:
+  """Reduce a URL to its bare host (no scheme, ``www.``, port or path)."""
   if not value:
     return None
-  return re.sub(r"\s+", " ", value).strip()
+  host = re.sub(r"^[a-z][a-z0-9+.-]*://", "", str(value).strip().lower())
+  host = re.split(r"[/?#:]", host, maxsplit=1)[0]
+  host = host[4:] if host.startswith("www.") else host
+  if "." not in host or host in SHARED_DOMAINS:
+    return None
+  return host
 
 
 def open_hours_flag(record: Hospital) -> bool:
@@ -222,70 +275,159 @@ def open_hours_flag(record: Hospital) -> bool:
   return "24" in hours or "24/7" in hours or "24 7" in hours
 
 
+Loader = Callable[[pathlib.Path], Iterable[Hospital]]
+Sniffer = Callable[[bytes], bool]
+
+SNIFF_BYTES = 4096
+LOADERS: Dict[str, Loader] = {}
+SUFFIX_FORMATS: Dict[str, str] = {}
+SNIFFERS: List[Tuple[str, Sniffer]] = []
+
+
+def register_loader(
+  fmt: str,
+  suffixes: Iterable[str] = (),
+  sniff: Optional[Sniffer] = None,
+) -> Callable[[Loader], Loader]:
+  """Register ``loader`` for a raw-drop format.
+
+  ``sniff`` receives the first ``SNIFF_BYTES`` of a file and claims it when it
+  returns True; ``suffixes`` are only consulted when no sniffer matches, so a
+  misnamed file is dispatched by its content rather than its extension.
+  """
+
+  def decorator(loader: Loader) -> Loader:
+    LOADERS[fmt] = loader
+    for suffix in suffixes:
+      SUFFIX_FORMATS[suffix.lower()] = fmt
+    if sniff is not None:
+      SNIFFERS.append((fmt, sniff))
+    return loader
+
+  return decorator
+
+
+def _text_head(head: bytes) -> bytes:
+  return head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+
+
+def sniff_pdf(head: bytes) -> bool:
+  return head.startswith(b"%PDF")
+
+
+def sniff_ole2(head: bytes) -> bool:
+  return head.startswith(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1")
+
+
+def sniff_xlsx(head: bytes) -> bool:
+  return head.startswith(b"PK\x03\x04") and (b"[Content_Types].xml" in head or b"xl/" in head)
+
+
+def sniff_html(head: bytes) -> bool:
+  # Exports often open with a comment or XML prolog before <html>.
+  text = _text_head(head)
+  return text.startswith(b"<!doctype html") or b"<html" in text or b"<table" in text
+
+
+def sniff_json(head: bytes) -> bool:
+  return _text_head(head).startswith((b"[", b"{"))
+
+
+def sniff_format(path: pathlib.Path) -> Optional[str]:
+  """Identify a raw file's format from its magic bytes, falling back to the suffix."""
+
+  with path.open("rb") as fh:
+    head = fh.read(SNIFF_BYTES)
+  for fmt, sniff in SNIFFERS:
+    if sniff(head):
+      return fmt
+  return SUFFIX_FORMATS.get(path.suffix.lower())
+
+
+def loader_for(path: pathlib.Path) -> Optional[Loader]:
+  fmt = sniff_format(path)
+  return LOADERS.get(fmt) if fmt else None
+
+
+@functools.lru_cache(maxsize=None)
+def optional_module(name: str):
+  """Import a heavy optional parser (openpyxl, pdfplumber, xlrd, bs4) on first use.
+
+  Keeping these out of module import means tools that only need the
+  normalisation helpers do not pay for pdfminer/Pillow start-up.
+  """
+  return importlib.import_module(name)
+
+
+@register_loader("json", suffixes=[".json"], sniff=sniff_json)
 def load_json(path: pathlib.Path) -> List[Hospital]:
   with path.open() as fh:
     return json.load(fh)
 
 
-def load_csv(path: pathlib.Path) -> List[Hospital]:
-  rows: List[Hospital] = []
+@register_loader("csv", suffixes=[".csv"])
+def load_csv(path: pathlib.Path) -> Iterator[Hospital]:
   with path.open(newline="") as fh:
-    reader = csv.DictReader(fh)
-    rows.extend(row for row in reader)
-  return rows
+    yield from csv.DictReader(fh)
 
 
-def load_xlsx(path: pathlib.Path) -> List[Hospital]:
-  """Load rows from an XLSX file."""
+@register_loader("xlsx", suffixes=[".xlsx"], sniff=sniff_xlsx)
+def load_xlsx(path: pathlib.Path) -> Iterator[Hospital]:
+  """Stream rows from an XLSX file (read-only mode keeps one row in memory)."""
 
-  if not OPENPYXL_AVAILABLE or openpyxl is None:
+  if not OPENPYXL_AVAILABLE:
     print(f"Skipping {path.name} (openpyxl not installed)")
-    return []
+    return
 
-  workbook = openpyxl.load_workbook(path)
-  sheet = workbook.active
-  headers = [str(cell.value).strip() if cell.value else "" for cell in next(sheet.iter_rows(max_row=1))]
-  facilities: List[Hospital] = []
-  for row in sheet.iter_rows(min_row=2, values_only=True):
-    record = {headers[idx]: value for idx, value in enumerate(row) if headers[idx]}
-    facilities.append(record)
-  return facilities
+  openpyxl = optional_module("openpyxl")
+  workbook = openpyxl.load_workbook(path, read_only=True)
+  try:
+    sheet = workbook.active
+    headers = [str(cell.value).strip() if cell.value else "" for cell in next(sheet.iter_rows(max_row=1))]
+    for row in sheet.iter_rows(min_row=2, values_only=True):
+      yield {headers[idx]: value for idx, value in enumerate(row) if idx < len(headers) and headers[idx]}
+  finally:
+    workbook.close()
 
 
-def load_xls(path: pathlib.Path) -> List[Hospital]:
-  """Load rows from an XLS file."""
+@register_loader("xls", suffixes=[".xls"], sniff=sniff_ole2)
+def load_xls(path: pathlib.Path) -> Iterator[Hospital]:
+  """Load rows from a binary (OLE2) XLS workbook.
 
-  if not XLRD_AVAILABLE or xlrd is None:
+  HTML tables saved with an ``.xls`` name are normally sniffed by
+  ``sniff_format`` and routed to ``load_html_tables``. One whose ``<html``
+  sits past the sniffed head is still caught here when xlrd rejects it.
+  """
+
+  if not XLRD_AVAILABLE:
     print(f"Skipping {path.name} (xlrd not installed)")
-    return []
+    return
 
+  xlrd = optional_module("xlrd")
   try:
     workbook = xlrd.open_workbook(path)
-  except XLRDError:
-    text = path.read_text(encoding="utf-8", errors="ignore")
-    if "<html" in text.lower():
-      print(f"{path.name} is HTML mislabeled as XLS; parsing tables instead")
-      return load_html_tables(path)
-    raise
-
+  except optional_module("xlrd.biffh").XLRDError:
+    if "<html" not in path.read_text(encoding="utf-8", errors="ignore").lower():
+      raise
+    print(f"{path.name} is HTML mislabeled as XLS; parsing tables instead")
+    yield from load_html_tables(path)
+    return
   sheet = workbook.sheet_by_index(0)
   headers = [str(value).strip() if value is not None else "" for value in sheet.row_values(0)]
-  facilities: List[Hospital] = []
   for row_idx in range(1, sheet.nrows):
     values = sheet.row_values(row_idx)
-    record = {headers[idx]: values[idx] for idx in range(len(headers)) if headers[idx]}
-    facilities.append(record)
-  return facilities
+    yield {headers[idx]: values[idx] for idx in range(min(len(headers), len(values))) if headers[idx]}
 
 
-def load_pdf_tables(path: pathlib.Path) -> List[Hospital]:
-  """Load tabular data from a PDF."""
+@register_loader("pdf", suffixes=[".pdf"], sniff=sniff_pdf)
+def load_pdf_tables(path: pathlib.Path) -> Iterator[Hospital]:
+  """Stream table rows from a PDF page by page."""
 
-  if not PDFPLUMBER_AVAILABLE or pdfplumber is None:
+  if not PDFPLUMBER_AVAILABLE:
     print(f"Skipping {path.name} (pdfplumber not installed)")
-    return []
+    return
 
-  facilities: List[Hospital] = []
+  pdfplumber = optional_module("pdfplumber")
   with pdfplumber.open(path) as pdf:
     for page in pdf.pages:
       for table in page.extract_tables() or []:
@@ -299,17 +441,19 @@ def load_pdf_tables(path: pathlib.Path) -> List[Hospital]:
             if header:
               record[header] = str(cell).strip() if cell else ""
           if record:
-            facilities.append(record)
-  return facilities
+            yield record
+      page.flush_cache()
 
 
-def load_html_tables(path: pathlib.Path) -> List[Hospital]:
+@register_loader("html", suffixes=[".htm", ".html"], sniff=sniff_html)
+def load_html_tables(path: pathlib.Path) -> Iterator[Hospital]:
   """Parse HTML tables into row dicts."""
 
-  from bs4 import BeautifulSoup  # type: ignore
+  if not BS4_AVAILABLE:
+    print(f"Skipping {path.name} (beautifulsoup4 not installed)")
+    return
 
-  facilities: List[Hospital] = []
-  soup = BeautifulSoup(path.read_text(encoding="utf-8", errors="ignore"), "html.parser")
+  soup = optional_module("bs4").BeautifulSoup(path.read_text(encoding="utf-8", errors="ignore"), "html.parser")
   for table in soup.find_all("table"):
     headers: List[str] = []
     all_rows = table.find_all("tr")
@@ -327,8 +471,7 @@ def load_html_tables(path: pathlib.Path) -> List[Hospital]:
       for idx, cell in enumerate(cells):
         header = headers[idx] if idx < len(headers) and headers[idx] else f"column_{idx}"
         record[header] = cell
-      facilities.append(record)
-  return facilities
+      yield record
 
 
 def coerce_bool(value: object) -> bool:
@@ -387,34 +530,57 @@ def normalize_raw_record(record: Hospital, source_label: str = "") -> Hospital:
   return normalised
 
 
-def load_raw_sources() -> List[Hospital]:
-  facilities: List[Hospital] = []
-  fetch_remote_sources()
-  if not RAW_DIR.exists():
-    return facilities
-
-  for file in RAW_DIR.glob("*.*"):
-    source_label = file.stem
-    raw_records: List[Hospital] = []
-    if file.suffix.lower() == ".json":
-      raw_records = load_json(file)
-    elif file.suffix.lower() == ".csv":
-      raw_records = load_csv(file)
-    elif file.suffix.lower() == ".xlsx":
-      raw_records = load_xlsx(file)
-    elif file.suffix.lower() == ".xls":
-      raw_records = load_xls(file)
-    elif file.suffix.lower() == ".pdf":
-      raw_records = load_pdf_tables(file)
-    elif file.suffix.lower() in {".htm", ".html"}:
-      raw_records = load_html_tables(file)
-
-    for record in raw_records:
-      facilities.append(normalize_raw_record(record, source_label))
-  return facilities
-
-
-def fetch_remote_sources() -> None:
+def iter_raw_files(raw_dir: Optional[pathlib.Path] = None) -> List[pathlib.Path]:
+  raw_dir = raw_dir or RAW_DIR
+  if not raw_dir.exists():
+    return []
+  return sorted(file for file in raw_dir.glob("*.*") if file.is_file())
+
+
+Transport = Callable[[str], bytes]
+
+
+def requests_transport(url: str) -> bytes:
+  """Fetch ``url`` over HTTP; the default transport."""
+
+  import requests
+
+  resp = requests.get(url, timeout=60, headers=REQUEST_HEADERS)
+  resp.raise_for_status()
+  return resp.content
+
+
+def fixture_transport(fixture_dir: Optional[pathlib.Path] = None) -> Transport:
+  """A transport that never touches the network.
+
+  Remote attachments are served from ``fixture_dir`` under their configured
+  filename (or the last URL segment); without a fixture, or without a
+  directory at all, the fetch fails like an unreachable host would.
+  """
+
+  filenames = {meta["url"]: meta["filename"] for meta in REMOTE_RAW_SOURCES.values()}
+
+  def fetch(url: str) -> bytes:
+    name = filenames.get(url) or url.rstrip("/").rsplit("/", 1)[-1]
+    if fixture_dir is None or not (fixture_dir / name).is_file():
+      raise ConnectionError(f"offline: no fixture for {url}")
+    return (fixture_dir / name).read_bytes()
+
+  return fetch
+
+
+def default_transport() -> Transport:
+  """``requests_transport``, or an offline fixture transport when ``PIPELINE_OFFLINE=1``."""
+
+  import os
+
+  if os.getenv("PIPELINE_OFFLINE", "").strip() in {"1", "true", "yes"}:
+    fixtures = os.getenv("PIPELINE_FIXTURES", "").strip()
+    return fixture_transport(pathlib.Path(fixtures) if fixtures else None)
+  return requests_transport
+
+
+def fetch_remote_sources(transport: Optional[Transport] = None, raw_dir: Optional[pathlib.Path] = None) -> None:
   """Download trusted remote attachments into the raw directory for parsing.
 
   If a download fails and no cached copy exists locally, we raise so the
@@ -422,25 +588,27 @@ def fetch_remote_sources() -> None:
   facilities such as Totonga Clinic). Set ``ALLOW_REMOTE_FAILURES=1`` to
   continue despite missing attachments when running locally without
   internet; cached files will still be reused when present.
+
+  Downloads go through ``transport`` (see :func:`default_transport`); pass
+  :func:`fixture_transport` for hermetic runs.
   """
 
   import os
-  import requests
 
+  transport = transport or default_transport()
+  raw_dir = raw_dir or RAW_DIR
   allow_failures = os.getenv("ALLOW_REMOTE_FAILURES", "").strip() in {"1", "true", "yes"}
   require_remote = os.getenv("REQUIRE_REMOTE_ATTACHMENTS", "").strip() in {"1", "true", "yes"}
-  RAW_DIR.mkdir(parents=True, exist_ok=True)
+  raw_dir.mkdir(parents=True, exist_ok=True)
 
   failures: list[str] = []
   for meta in REMOTE_RAW_SOURCES.values():
-    dest = RAW_DIR / meta["filename"]
+    dest = raw_dir / meta["filename"]
     if dest.exists():
       continue
     url = meta["url"]
     try:
-      resp = requests.get(url, timeout=60, headers=REQUEST_HEADERS)
-      resp.raise_for_status()
-      dest.write_bytes(resp.content)
+      dest.write_bytes(transport(url))
       print(f"Downloaded {url} -> {dest}")
     except Exception as exc:  # noqa: BLE001
       note = f"{url} ({exc})"
@@ -551,88 +719,276 @@ def merge_sources(a: Iterable[str], b: Iterable[str]) -> List[str]:
   return sorted(merged) if merged else []
 
 
-def deduplicate_facilities(facilities: List[Hospital]) -> List[Hospital]:
-  """Merge near-duplicate facilities using fuzzy name matching.
+def start_canonical(record: Hospital, key: str) -> Hospital:
+  record.setdefault("aliases", [])
+  record.setdefault("source", [])
+  record.setdefault("confidence", "medium")
+  if not record.get("verified"):
+    record["verified"] = any(src in TRUSTED_SOURCES for src in record.get("source", []))
+  record["_key"] = key
+  return record
+
+
+def merge_into(matched: Hospital, record: Hospital, high_confidence: bool) -> None:
+  """Fold ``record`` into the canonical ``matched`` entry, filling gaps only.
 
-  Facilities are compared within the same province/district context. The best
-  canonical name wins; alternate spellings are captured in ``aliases``.
+  ``high_confidence`` (an exact-key join or a fuzzy score above the engine's
+  ``FUZZY_THRESHOLDS`` high mark) upgrades the entry's confidence.
   """
-  canonical: List[Hospital] = []
-  for record in facilities:
-    district = record.get("district") or record.get("city") or ""
-    province = record.get("province") or ""
-    key = make_key(record.get("name", ""), district, province)
-    matched: Optional[Hospital] = None
-    matched_score = 0
-    for existing in canonical:
-      same_province = normalize_text(existing.get("province", "")) == normalize_text(province)
-      same_district = normalize_text(existing.get("district", "")) == normalize_text(district)
-      if not (same_province or same_district):
+
+  aliases = set(matched.get("aliases", [])) | {record.get("name", "")}
+  matched["aliases"] = sorted({a for a in aliases if a})
+  matched_sources = merge_sources(matched.get("source", []), record.get("source", []))
+  matched["source"] = matched_sources
+  matched["confidence"] = "high" if high_confidence else matched.get("confidence", "medium")
+  matched["verified"] = matched.get("verified") or any(src in TRUSTED_SOURCES for src in matched_sources)
+
+  for field in [
+    "facility_type",
+    "ownership",
+    "rural_urban",
+    "province",
+    "district",
+    "ward",
+    "city",
+    "address",
+    "emergency_level",
+    "cost_band",
+    "tier",
+    "website",
+    "email",
+    "last_verified",
+  ]:
+    matched[field] = merge_field(matched.get(field), record.get(field))
+
+  matched_services = set(matched.get("services", []) or []) | set(record.get("services", []) or [])
+  matched["services"] = sorted(matched_services) if matched_services else []
+
+  matched_aids = set(matched.get("medical_aids", []) or []) | set(record.get("medical_aids", []) or [])
+  matched["medical_aids"] = sorted(matched_aids) if matched_aids else []
+
+  matched_aliases = set(matched.get("aliases", []) or []) | set(record.get("aliases", []) or [])
+  matched["aliases"] = sorted(a for a in matched_aliases if a)
+
+  for coord_field in ["lat", "lon", "latitude", "longitude"]:
+    if matched.get("lat") and matched.get("lon"):
+      break
+    if coord_field in record:
+      matched["lat"] = record.get("lat") or record.get("latitude")
+      matched["lon"] = record.get("lon") or record.get("longitude")
+
+  for phone_field in ["phone", "whatsapp"]:
+    matched[phone_field] = merge_field(matched.get(phone_field), record.get(phone_field))
+
+
+def exact_join_keys(record: Hospital) -> List[Tuple[str, str]]:
+  """Exact identity keys for the hash-join pass, strongest first.
+
+  Explicit ids are global. Phones are scoped to the province and websites to
+  the district, because chains share head-office numbers and domains across
+  branches.
+  """
+
+  province = normalize_text(str(record.get("province") or ""))
+  district = normalize_text(str(record.get("district") or record.get("city") or ""))
+  keys: List[Tuple[str, str]] = []
+  if record.get("id"):
+    keys.append(("id", str(record["id"]).strip().lower()))
+  phone = clean_phone(record.get("phone"), e164=True)
+  if phone:
+    keys.append(("phone", f"{province}::{phone}"))
+  domain = website_domain(record.get("website"))
+  if domain:
+    keys.append(("website", f"{province}::{district}::{domain}"))
+  return keys
+
+
+def conflicting_contacts(existing: Hospital, record: Hospital) -> bool:
+  """True when both records carry different phones or domains (likely sibling branches)."""
+
+  for normalise, field in [(lambda v: clean_phone(v, e164=True), "phone"), (website_domain, "website")]:
+    left, right = normalise(existing.get(field)), normalise(record.get(field))
+    if left and right and left != right:
+      return True
+  return False
+
+
+MATCH_ENGINES = ("sequence", "tfidf")
+# (match, high confidence) cut-offs per engine, each on the engine's own scale:
+# SequenceMatcher ratio x 100, trigram TF-IDF cosine. The two scales are not linearly
+# related; the cosine marks give the precision of the ratio ones on the
+# name-matching benchmark's noisy re-listings (cosine 0.77 ~ ratio 88, 0.80 ~ 92).
+FUZZY_THRESHOLDS: Dict[str, Tuple[float, float]] = {"sequence": (88, 92), "tfidf": (0.77, 0.80)}
+
+
+class DedupIndex:
+  """Streaming dedup state: canonical records plus the lookups used to match them.
+
+  Each incoming record is first hash-joined on its exact keys (``id``, E.164
+  phone, website domain); only records with no exact hit are fuzzy-scored,
+  and then only against canonical entries sharing their province or
+  district. The index is the only part of the pipeline that holds the whole
+  (deduplicated) dataset.
+  """
+
+  def __init__(self, engine: str = "sequence") -> None:
+    self.match_threshold, self.high_threshold = FUZZY_THRESHOLDS[engine]
+    self.canonical: List[Hospital] = []
+    self._exact: Dict[Tuple[str, str], int] = {}
+    self._by_province: Dict[str, Set[int]] = {}
+    self._by_district: Dict[str, Set[int]] = {}
+    self._names: List[str] = []
+
+  def add(self, record: Hospital, candidates: Optional[List[Tuple[int, float]]] = None) -> Tuple[int, str, float]:
+    """Fold ``record`` into the index; return its canonical position and how it matched.
+
+    The match kind is ``new``, ``id``, ``phone``, ``website`` or ``fuzzy``.
+    ``candidates`` are precomputed ``(position, score)`` fuzzy matches from a
+    batch engine; without them the record is scored with ``SequenceMatcher``.
+    Scores are on the index engine's scale; exact joins score ``inf``.
+    """
+
+    keys = exact_join_keys(record)
+    position, matched_by, score = self._exact_match(record, keys)
+    if position is None:
+      position, score = self._fuzzy_match(record) if candidates is None else self._best_candidate(record, candidates)
+      matched_by = "fuzzy" if position is not None else "new"
+
+    if position is None:
+      district = record.get("district") or record.get("city") or ""
+      key = make_key(record.get("name", ""), district, record.get("province") or "")
+      position = len(self.canonical)
+      self.canonical.append(start_canonical(record, key))
+      self._names.append(normalize_text(record.get("name", "")))
+    else:
+      merge_into(self.canonical[position], record, score > self.high_threshold)
+
+    self._register(position)
+    for join_key in keys:
+      self._exact.setdefault(join_key, position)
+    return position, matched_by, score
+
+  def _exact_match(self, record: Hospital, keys: List[Tuple[str, str]]) -> Tuple[Optional[int], str, float]:
+    for join_key in keys:
+      position = self._exact.get(join_key)
+      if position is None:
+        continue
+      if join_key[0] != "id" and conflicting_contacts(self.canonical[position], record):
         continue
-      score = SequenceMatcher(
-        None,
-        normalize_text(existing.get("name", "")),
-        normalize_text(record.get("name", "")),
-      ).ratio() * 100
-      if score > 88 and score > matched_score:
-        matched = existing
+      return position, join_key[0], float("inf")
+    return None, "", 0
+
+  def _same_context(self, position: int, province: str, district: str) -> bool:
+    existing = self.canonical[position]
+    return normalize_text(existing.get("province", "")) == province or normalize_text(existing.get("district", "")) == district
+
+  def _best_candidate(self, record: Hospital, candidates: List[Tuple[int, float]]) -> Tuple[Optional[int], float]:
+    province = normalize_text(record.get("province") or "")
+    district = normalize_text(record.get("district") or record.get("city") or "")
+    for position, score in sorted(candidates, key=lambda item: -item[1]):
+      if self._same_context(position, province, district):
+        return position, score
+    return None, 0.0
+
+  def _fuzzy_match(self, record: Hospital) -> Tuple[Optional[int], float]:
+    province = normalize_text(record.get("province") or "")
+    district = normalize_text(record.get("district") or record.get("city") or "")
+    candidates = self._by_province.get(province, set()) | self._by_district.get(district, set())
+    matcher = SequenceMatcher(None)
+    matcher.set_seq2(normalize_text(record.get("name", "")))
+    matched: Optional[int] = None
+    matched_score = 0.0
+    for position in sorted(candidates):
+      if not self._same_context(position, province, district):
+        continue
+      matcher.set_seq1(self._names[position])
+      # real_quick_ratio/quick_ratio are upper bounds on ratio(); skip hopeless pairs cheaply.
+      floor = max(self.match_threshold, matched_score)
+      if matcher.real_quick_ratio() * 100 <= floor or matcher.quick_ratio() * 100 <= floor:
+        continue
+      score = matcher.ratio() * 100
+      if score > self.match_threshold and score > matched_score:
+        matched = position
         matched_score = score
-    if not matched:
-      record.setdefault("aliases", [])
-      record.setdefault("source", [])
-      record.setdefault("confidence", "medium")
-      if not record.get("verified"):
-        record["verified"] = any(src in TRUSTED_SOURCES for src in record.get("source", []))
-      record["_key"] = key
-      canonical.append(record)
-      continue
+    return matched, matched_score
+
+  def _register(self, position: int) -> None:
+    existing = self.canonical[position]
+    self._by_province.setdefault(normalize_text(existing.get("province", "")), set()).add(position)
+    self._by_district.setdefault(normalize_text(existing.get("district", "")), set()).add(position)
+
 
-    aliases = set(matched.get("aliases", [])) | {record.get("name", "")}
-    matched["aliases"] = sorted({a for a in aliases if a})
-    matched_sources = merge_sources(matched.get("source", []), record.get("source", []))
-    matched["source"] = matched_sources
-    matched["confidence"] = "high" if matched_score > 92 else matched.get("confidence", "medium")
-    matched["verified"] = matched.get("verified") or any(src in TRUSTED_SOURCES for src in matched_sources)
-
-    for field in [
-      "facility_type",
-      "ownership",
-      "rural_urban",
-      "province",
-      "district",
-      "ward",
-      "city",
-      "address",
-      "emergency_level",
-      "cost_band",
-      "tier",
-      "website",
-      "email",
-      "last_verified",
-    ]:
-      matched[field] = merge_field(matched.get(field), record.get(field))
-
-    matched_services = set(matched.get("services", []) or []) | set(record.get("services", []) or [])
-    matched["services"] = sorted(matched_services) if matched_services else []
-
-    matched_aids = set(matched.get("medical_aids", []) or []) | set(record.get("medical_aids", []) or [])
-    matched["medical_aids"] = sorted(matched_aids) if matched_aids else []
-
-    matched_aliases = set(matched.get("aliases", []) or []) | set(record.get("aliases", []) or [])
-    matched["aliases"] = sorted(a for a in matched_aliases if a)
-
-    for coord_field in ["lat", "lon", "latitude", "longitude"]:
-      if matched.get("lat") and matched.get("lon"):
-        break
-      if coord_field in record:
-        matched["lat"] = record.get("lat") or record.get("latitude")
-        matched["lon"] = record.get("lon") or record.get("longitude")
-
-    for phone_field in ["phone", "whatsapp"]:
-      matched[phone_field] = merge_field(matched.get(phone_field), record.get(phone_field))
+def batch_fuzzy_candidates(records: List[Hospital]) -> Dict[int, List[Tuple[int, float]]]:
+  """Earlier-record fuzzy candidates per record from the trigram TF-IDF engine (cosine scores).
+
+  Like the sequence scorer, names are blocked by province and by district:
+  pairs found in either grouping are kept, with their best score.
+  """
+
+  matching = optional_module("name_matching")
+  names = [normalize_text(record.get("name", "")) for record in records]
+  provinces = [normalize_text(record.get("province") or "") for record in records]
+  districts = [normalize_text(record.get("district") or record.get("city") or "") for record in records]
+  threshold = FUZZY_THRESHOLDS["tfidf"][0]
+  scores: Dict[Tuple[int, int], float] = {}
+  for groups in (provinces, districts):
+    for later, earlier, score in matching.candidate_pairs(names, groups, threshold=threshold):
+      scores[(later, earlier)] = max(score, scores.get((later, earlier), 0.0))
+  candidates: Dict[int, List[Tuple[int, float]]] = {}
+  for (later, earlier), score in sorted(scores.items()):
+    candidates.setdefault(later, []).append((earlier, score))
+  return candidates
+
+
+def deduplicate_facilities(
+  facilities: Iterable[Hospital],
+  stats: Optional[Counter] = None,
+  engine: str = "sequence",
+) -> List[Hospital]:
+  """Merge duplicate facilities: exact hash join first, then fuzzy name matching.
+
+  Records sharing an explicit ``id``, phone number or website domain are joined
+  regardless of spelling. Unmatched records are compared within the same
+  province/district context. The best canonical name wins; alternate
+  spellings are captured in ``aliases``. ``facilities`` is consumed once, so
+  it can be a generator. When ``stats`` is a Counter it receives merge counts
+  per key (``id``, ``phone``, ``website``, ``fuzzy``).
+
+  ``engine`` selects the fuzzy scorer: ``sequence`` scores each candidate
+  pair with ``SequenceMatcher`` as records stream in; ``tfidf`` materialises
+  the records and scores names per province in NumPy batches
+  (``scripts/name_matching.py``), matching each record against the canonical
+  entries that its similar earlier records were folded into.
+  """
+  canonical, _ = dedup_assignments(facilities, stats, engine)
   return canonical
 
 
+def dedup_assignments(
+  facilities: Iterable[Hospital],
+  stats: Optional[Counter] = None,
+  engine: str = "sequence",
+) -> Tuple[List[Hospital], List[int]]:
+  """Like :func:`deduplicate_facilities`, also returning each input record's canonical position."""
+
+  if engine not in MATCH_ENGINES:
+    raise ValueError(f"Unknown match engine {engine!r}; expected one of {', '.join(MATCH_ENGINES)}")
+
+  index = DedupIndex(engine)
+  positions: List[int] = []
+  candidates: Dict[int, List[Tuple[int, float]]] = {}
+  if engine == "tfidf":
+    facilities = list(facilities)
+    candidates = batch_fuzzy_candidates(facilities)
+  for offset, record in enumerate(facilities):
+    earlier = [(positions[other], score) for other, score in candidates.get(offset, [])] if engine == "tfidf" else None
+    position, matched_by, _ = index.add(record, earlier)
+    positions.append(position)
+    if stats is not None and matched_by != "new":
+      stats[matched_by] += 1
+  return index.canonical, positions
+
+
 def map_to_schema(record: Hospital) -> Hospital:
   """Transform a heterogeneous raw record into the export schema."""
   facility_type = classify_facility_type(record)
@@ -689,7 +1045,7 @@ def map_to_schema(record: Hospital) -> Hospital:
   return export
 
 
-def validate_facilities(facilities: List[Hospital]) -> List[Hospital]:
+def validate_facilities(facilities: Iterable[Hospital]) -> List[Hospital]:
   cleaned: List[Hospital] = []
   for item in facilities:
     if not item.get("name") or not item.get("province"):
@@ -698,36 +1054,347 @@ def validate_facilities(facilities: List[Hospital]) -> List[Hospital]:
   return cleaned
 
 
-def run_pipeline() -> List[Hospital]:
-  raw_records: List[Hospital] = []
-  raw_records.extend(load_raw_sources())
-  for scraper in SCRAPERS:
-    raw_records.extend(scraper())
+class Source:
+  """One pipeline input: a raw file under ``data/raw`` or a stub scraper.
+
+  File rows are coerced by ``normalize_raw_record`` and tagged with the file
+  stem; scraper rows are already in the loose raw shape and pass through.
+  A scraper runs at most once per source object and its fingerprint is the
+  digest of what it returned, since nothing on disk says when it changed.
+  """
+
+  def __init__(self, label: str, path: Optional[pathlib.Path] = None, scraper: Optional[Callable[[], List[Hospital]]] = None) -> None:
+    self.label = label
+    self.path = path
+    self.scraper = scraper
+    self._scraped: Optional[List[Hospital]] = None
+
+  def scraped_rows(self) -> List[Hospital]:
+    if self._scraped is None:
+      self._scraped = list(self.scraper())
+    return self._scraped
+
+  @property
+  def cache_name(self) -> str:
+    return self.path.name if self.path is not None else f"{self.label}.scraper"
+
+  def fingerprint(self) -> str:
+    if self.path is None:
+      return f"scraper:{self.label}:{_digest(self.scraped_rows())}"
+    stat = self.path.stat()
+    return f"file:{self.path.name}:{stat.st_size}:{stat.st_mtime_ns}:{sniff_format(self.path)}"
 
-  deduped = deduplicate_facilities(raw_records)
-  normalized = [map_to_schema(record) for record in deduped]
-  validated = validate_facilities(normalized)
+  def rows(self) -> Iterator[Hospital]:
+    if self.scraper is not None:
+      yield from self.scraped_rows()
+      return
+    loader = loader_for(self.path)
+    if loader is not None:
+      yield from loader(self.path)
 
-  for record in validated:
+
+def pipeline_sources(only_sources: Optional[Iterable[str]] = None, raw_dir: Optional[pathlib.Path] = None) -> List[Source]:
+  """Raw files with a registered loader plus the stub scrapers, optionally filtered by label."""
+
+  sources = [Source(file.stem, path=file) for file in iter_raw_files(raw_dir) if sniff_format(file) in LOADERS]
+  sources.extend(Source(scraper.__name__, scraper=scraper) for scraper in SCRAPERS)
+  if only_sources:
+    wanted = set(only_sources)
+    unknown = wanted - {source.label for source in sources} - {source.cache_name for source in sources}
+    if unknown:
+      raise ValueError(f"Unknown source(s): {', '.join(sorted(unknown))}")
+    sources = [source for source in sources if source.label in wanted or source.cache_name in wanted]
+  return sources
+
+
+def stage_load(sources: List[Source], checkpoints: Optional["StageCheckpoints"] = None) -> Iterator[Tuple[Optional[str], Hospital]]:
+  """Stream every source as ``(label, row)`` pairs; the label is None for scraper rows."""
+
+  for source in sources:
+    rows = checkpoints.source_rows(source) if checkpoints is not None else source.rows()
+    label = source.label if source.path is not None else None
+    for row in rows:
+      yield label, row
+
+
+def stage_normalize(pairs: Iterable[Tuple[Optional[str], Hospital]]) -> Iterator[Hospital]:
+  for label, row in pairs:
+    yield normalize_raw_record(row, label) if label is not None else row
+
+
+def stage_dedup(records: Iterable[Hospital], engine: str = "sequence") -> Iterator[Hospital]:
+  """Consume the stream into a :class:`DedupIndex`, then hand canonical records on one at a time."""
+
+  merge_stats: Counter = Counter()
+  deduped: Deque[Hospital] = deque(deduplicate_facilities(records, merge_stats, engine))
+  if merge_stats:
+    print("Dedup merges by key: " + ", ".join(f"{key}={count}" for key, count in merge_stats.most_common()))
+  while deduped:
+    yield deduped.popleft()
+
+
+def stage_map(records: Iterable[Hospital]) -> Iterator[Hospital]:
+  for record in records:
+    yield map_to_schema(record)
+
+
+def stage_validate(records: Iterable[Hospital], registry: Optional[IdRegistry] = None) -> List[Hospital]:
+  """Filter and finalise mapped records; this is where the export list is materialised.
+
+  With a ``registry`` the slug ids proposed by ``map_to_schema`` are replaced
+  by the ids registered for each record's identity keys.
+  """
+
+  validated: List[Hospital] = []
+  for record in validate_facilities(records):
     if record.get("source"):
       record["confidence"] = "high" if len(record["source"]) > 1 else record.get("confidence", "medium")
     if record.get("open_24h") and record.get("emergency_level") == "Basic" and "Hospital" in record.get("facility_type", ""):
       record["emergency_level"] = "Full"
+    validated.append(record)
 
   validated.sort(key=lambda h: (h.get("province", ""), h.get("district", ""), h.get("name", "")))
+  if registry is not None:
+    outcomes = assign_ids(registry, [(identity_keys(record), record) for record in validated])
+    print("Facility ids: " + ", ".join(f"{outcome}={count}" for outcome, count in sorted(outcomes.items())))
+    for facility_id, identity, reason in registry.collisions[:COLLISION_REPORT_LIMIT]:
+      print(f"  - id collision {facility_id!r} for {identity!r}: {reason}")
   return validated
 
 
-def save_records(records: List[Hospital]) -> None:
-  SCRAPED_OUTPUT.write_text(json.dumps(records, indent=2, ensure_ascii=False) + "\n")
-  full_path = SCRAPED_OUTPUT.with_name("hospitals_scraped_full.json")
-  full_path.write_text(json.dumps(records, indent=2, ensure_ascii=False) + "\n")
+STAGES = ["fetch", "load", "normalize", "dedup", "map", "validate", "export"]
+# Bump when stage logic changes in a way that should invalidate saved artifacts.
+PIPELINE_VERSION = 3
+STAGE_DIR = ROOT / "data" / ".stages"
+STAGE_FUNCTIONS: Dict[str, Callable] = {
+  "normalize": stage_normalize,
+  "dedup": stage_dedup,
+  "map": stage_map,
+  "validate": stage_validate,
+}
+
+
+def _read_jsonl(path: pathlib.Path) -> Iterator:
+  with path.open() as fh:
+    for line in fh:
+      if line.strip():
+        yield json.loads(line)
+
+
+def _digest(*parts: object) -> str:
+  return hashlib.sha1(json.dumps(parts, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class StageCheckpoints:
+  """Versioned JSONL artifacts for each pipeline stage under ``STAGE_DIR``.
+
+  Every artifact has a ``<stage>.meta.json`` sidecar recording the pipeline
+  version, the fingerprint of its input and the digest of its output. A stage
+  is reused when its input fingerprint is unchanged, so a run after editing a
+  mapping rule with ``--from-stage map`` skips fetching, parsing and dedup.
+  ``from_stage`` and later are always recomputed. Stages before it must still
+  match this run's inputs (source selection, raw files, options); a stale
+  artifact raises instead of silently feeding old data forward. Parsed rows
+  of raw files are also cached per source, keyed on file size, mtime and
+  sniffed format; scraper rows are never cached.
+  """
+
+  def __init__(self, directory: pathlib.Path = STAGE_DIR, from_stage: Optional[str] = None) -> None:
+    if from_stage is not None and from_stage not in STAGES:
+      raise ValueError(f"Unknown stage {from_stage!r}; expected one of {', '.join(STAGES)}")
+    self.directory = directory
+    self.from_stage = from_stage
+    (directory / "sources").mkdir(parents=True, exist_ok=True)
+
+  def forced(self, stage: str) -> bool:
+    return self.from_stage is not None and STAGES.index(stage) >= STAGES.index(self.from_stage)
 
+  def resuming_past(self, stage: str) -> bool:
+    return self.from_stage is not None and STAGES.index(stage) < STAGES.index(self.from_stage)
 
-def main() -> None:
-  records = run_pipeline()
-  save_records(records)
-  print(f"Wrote {len(records)} facilities to {SCRAPED_OUTPUT}")
+  def artifact(self, stage: str) -> pathlib.Path:
+    return self.directory / f"{stage}.jsonl"
+
+  def meta(self, stage: str) -> Dict[str, object]:
+    path = self.directory / f"{stage}.meta.json"
+    if not path.exists():
+      return {}
+    try:
+      return json.loads(path.read_text())
+    except ValueError:
+      return {}
+
+  def reusable(self, stage: str, input_fingerprint: str, sources: Optional[List[str]] = None) -> bool:
+    """Whether the saved ``stage`` artifact was built from ``input_fingerprint``.
+
+    Raises ``ValueError`` when resuming past ``stage`` but its artifact is
+    missing or was built from other inputs, e.g. by a ``--only-source`` run.
+    """
+
+    meta = self.meta(stage)
+    usable = bool(meta) and self.artifact(stage).exists() and meta.get("version") == PIPELINE_VERSION
+    matches = usable and meta.get("input") == input_fingerprint
+    if self.resuming_past(stage) and not matches:
+      if not usable:
+        reason = "has no usable artifact"
+      elif sources is not None and meta.get("sources") is not None and meta["sources"] != sources:
+        reason = f"was built from sources {', '.join(meta['sources'])} but this run uses {', '.join(sources)}"
+      else:
+        reason = "was built from different inputs (raw files, pipeline options or upstream stages changed)"
+      raise ValueError(f"Cannot resume from {self.from_stage!r}: stage {stage!r} {reason}; rerun from {stage!r} or without --from-stage")
+    return matches and not self.forced(stage)
+
+  def read(self, stage: str) -> Iterator:
+    yield from _read_jsonl(self.artifact(stage))
+
+  def write(self, stage: str, input_fingerprint: str, items: Iterable, sources: Optional[List[str]] = None) -> Tuple[str, int]:
+    """Stream ``items`` into the stage artifact; return its digest and item count."""
+
+    digest = hashlib.sha1()
+    count = 0
+    with atomic_open(self.artifact(stage)) as fh:
+      for item in items:
+        line = json.dumps(item, ensure_ascii=False, default=str) + "\n"
+        digest.update(line.encode("utf-8"))
+        fh.write(line)
+        count += 1
+    output = digest.hexdigest()
+    meta = {"stage": stage, "version": PIPELINE_VERSION, "input": input_fingerprint, "output": output, "count": count}
+    if sources is not None:
+      meta["sources"] = sources
+    write_json_atomic(self.directory / f"{stage}.meta.json", meta)
+    return output, count
+
+  def source_rows(self, source: Source) -> Iterator[Hospital]:
+    """Yield a source's parsed rows, from its cache when the file is unchanged."""
+
+    if source.path is None:
+      yield from source.rows()
+      return
+    cache = self.directory / "sources" / f"{source.cache_name}.jsonl"
+    meta_path = cache.with_suffix(".meta.json")
+    fingerprint = _digest(PIPELINE_VERSION, source.fingerprint())
+    if not self.forced("load") and cache.exists() and meta_path.exists():
+      try:
+        cached = json.loads(meta_path.read_text()).get("input") == fingerprint
+      except ValueError:
+        cached = False
+      if cached:
+        yield from _read_jsonl(cache)
+        return
+    meta_path.unlink(missing_ok=True)
+    with atomic_open(cache) as fh:
+      for row in source.rows():
+        fh.write(json.dumps(row, ensure_ascii=False, default=str) + "\n")
+        yield row
+    write_json_atomic(meta_path, {"input": fingerprint})
+
+
+def run_pipeline(
+  only_sources: Optional[Iterable[str]] = None,
+  checkpoints: Optional[StageCheckpoints] = None,
+  raw_dir: Optional[pathlib.Path] = None,
+  match_engine: str = "sequence",
+  id_registry: Optional[IdRegistry] = None,
+  transport: Optional[Transport] = None,
+) -> List[Hospital]:
+  """Run fetch → load → normalize → dedup → map → validate and return export records.
+
+  Without ``checkpoints`` everything runs in memory. With them, each stage's
+  output is saved as an artifact and reused when its input is unchanged.
+  ``match_engine`` is passed to :func:`deduplicate_facilities` and
+  ``id_registry`` to :func:`stage_validate`; ``transport`` is used to
+  fetch remote attachments.
+  """
+
+  if checkpoints is None or not checkpoints.resuming_past("fetch"):
+    fetch_remote_sources(transport, raw_dir)
+  sources = pipeline_sources(only_sources, raw_dir)
+  options: Dict[str, Dict[str, object]] = {"dedup": {"engine": match_engine}, "validate": {"registry": id_registry}}
+  if checkpoints is None:
+    records: Iterable = stage_load(sources)
+    for stage in ["normalize", "dedup", "map", "validate"]:
+      records = STAGE_FUNCTIONS[stage](records, **options.get(stage, {}))
+    return list(records)
+
+  labels = sorted(source.cache_name for source in sources)
+  fingerprint = _digest(PIPELINE_VERSION, sorted(source.fingerprint() for source in sources))
+  # Stage options that change a stage's output are part of its input fingerprint;
+  # the registry counts by content, since any edit to it can change the ids.
+  stage_inputs = {"dedup": [match_engine], "validate": [id_registry.digest() if id_registry is not None else None]}
+  previous = ""
+  for stage in ["load", "normalize", "dedup", "map", "validate"]:
+    if stage in stage_inputs:
+      fingerprint = _digest(fingerprint, stage_inputs[stage])
+    stage_sources = labels if stage == "load" else None
+    if checkpoints.reusable(stage, fingerprint, stage_sources):
+      print(f"[{stage}] reusing {checkpoints.artifact(stage)}")
+      fingerprint = str(checkpoints.meta(stage)["output"])
+      previous = stage
+      continue
+    if stage == "load":
+      items: Iterable = stage_load(sources, checkpoints)
+    else:
+      upstream: Iterable = checkpoints.read(previous)
+      if stage == "normalize":
+        upstream = (tuple(pair) for pair in upstream)
+      items = STAGE_FUNCTIONS[stage](upstream, **options.get(stage, {}))
+    fingerprint, count = checkpoints.write(stage, fingerprint, items, stage_sources)
+    print(f"[{stage}] wrote {count} items to {checkpoints.artifact(stage)}")
+    previous = stage
+  return list(checkpoints.read(previous))
+
+
+def save_records(records: List[Hospital], output: pathlib.Path = SCRAPED_OUTPUT) -> None:
+  write_json_atomic(output, records)
+  if output == SCRAPED_OUTPUT:
+    write_json_atomic(SCRAPED_OUTPUT.with_name("hospitals_scraped_full.json"), records)
+    refresh_facet_cube(SCRAPED_FACETS, records)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+  parser = argparse.ArgumentParser(description="Run the hospitals.co.zw ETL pipeline.")
+  parser.add_argument("--from-stage", choices=STAGES, help="Reuse saved artifacts before this stage and recompute from it onward")
+  parser.add_argument(
+    "--only-source",
+    action="append",
+    metavar="NAME",
+    help="Restrict the run to a raw file stem/name or scraper function (repeatable)",
+  )
+  parser.add_argument("--stage-dir", type=pathlib.Path, default=STAGE_DIR, help="Where stage artifacts are kept")
+  parser.add_argument("--no-checkpoints", action="store_true", help="Run fully in memory without reading or writing artifacts")
+  parser.add_argument(
+    "--match-engine",
+    choices=MATCH_ENGINES,
+    default="sequence",
+    help="Fuzzy dedup scorer: per-pair SequenceMatcher or batched trigram TF-IDF (needs numpy)",
+  )
+  parser.add_argument(
+    "--output",
+    type=pathlib.Path,
+    help="Export path (defaults to data/hospitals_scraped_new.json; required to export a --only-source run)",
+  )
+  parser.add_argument("--offline", action="store_true", help="Never touch the network; missing attachments count as download failures")
+  parser.add_argument("--fixtures", type=pathlib.Path, help="Serve remote attachments from this directory (implies --offline)")
+  parser.add_argument("--id-registry", type=pathlib.Path, default=REGISTRY_PATH, help="Stable id registry (updated on export)")
+  parser.add_argument("--no-id-registry", action="store_true", help="Keep the slug ids proposed by map_to_schema")
+  args = parser.parse_args(argv)
+
+  checkpoints = None if args.no_checkpoints else StageCheckpoints(args.stage_dir, args.from_stage)
+  registry = None if args.no_id_registry else IdRegistry.load(args.id_registry)
+  transport = fixture_transport(args.fixtures) if args.offline or args.fixtures else None
+  try:
+    records = run_pipeline(args.only_source, checkpoints, match_engine=args.match_engine, id_registry=registry, transport=transport)
+  except ValueError as exc:
+    parser.error(str(exc))
+  if args.only_source and args.output is None:
+    print(f"Restricted run: {len(records)} facilities; pass --output to export (artifacts in {args.stage_dir})")
+    return
+  output = args.output or SCRAPED_OUTPUT
+  save_records(records, output)
+  if registry is not None:
+    registry.save()
+  print(f"Wrote {len(records)} facilities to {output}")
 
 
 if __name__ == "__main__":
@@ -3,25 +3,34 @@
 
 Rules:
 - Never drop existing hospitals.
-- Use a stable key (name + city/district) to match records.
+- Use a stable key (name + city/district) to match records; fall back to the
+  ``id`` and stored ``aliases`` of existing records before adding a new one.
 - Only fill empty/missing fields from the new scrape; do not overwrite richer existing data.
 - Track first_seen/last_seen dates for provenance.
 """
 
 from __future__ import annotations
 
+import argparse
 import datetime as dt
 import json
 import pathlib
 from collections import Counter
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterable, List, Optional
+
+from atomic_io import file_digest, write_json_atomic
+from catalogue_store import CatalogueStore
+from facets import refresh_facet_cube
+from geocode import APPROX_FIELDS, clear_approximation, coordinates, fill_missing_coordinates
 
 ROOT = pathlib.Path(__file__).resolve().parents[1]
 CURRENT_PATH = ROOT / "data" / "hospitals.json"
 SCRAPED_PATH = ROOT / "data" / "hospitals_scraped_new.json"
 SCRAPED_FALLBACK_PATH = ROOT / "data" / "hospitals_scraped_full.json"
 FULL_PATH = ROOT / "data" / "hospitals_full.json"
+FACETS_PATH = ROOT / "data" / "hospitals_facets.json"
 TODAY = dt.date.today().isoformat()
+COLLISION_REPORT_LIMIT = 20
 
 Hospital = Dict[str, Any]
 
@@ -30,10 +39,25 @@ def normalize(value: str) -> str:
   return " ".join(str(value or "").strip().lower().split())
 
 
+def record_location(record: Hospital) -> str:
+  return normalize(record.get("city") or record.get("town") or record.get("district") or record.get("province"))
+
+
 def make_key(record: Hospital) -> str:
   name = normalize(record.get("name", ""))
-  location = normalize(record.get("city") or record.get("town") or record.get("district") or record.get("province"))
-  return f"{name}::{location}"
+  return f"{name}::{record_location(record)}"
+
+
+def name_keys(record: Hospital) -> list[str]:
+  """Merge keys for the record's name and each of its ``aliases`` at its location."""
+
+  location = record_location(record)
+  aliases = record.get("aliases") if isinstance(record.get("aliases"), list) else []
+  keys: list[str] = []
+  for name in [record.get("name", ""), *aliases]:
+    if normalize(name):
+      keys.append(f"{normalize(name)}::{location}")
+  return list(dict.fromkeys(keys))
 
 
 def has_value(value: Any) -> bool:
@@ -86,6 +110,10 @@ def update_record(existing: Hospital, incoming: Hospital) -> None:
     if key in {"first_seen", "last_seen"}:
       continue
 
+    if key in APPROX_FIELDS:
+      # Centroid fills are recomputed over the merged catalogue after every merge.
+      continue
+
     if not has_value(new_value):
       continue
 
@@ -100,6 +128,9 @@ def update_record(existing: Hospital, incoming: Hospital) -> None:
     else:
       existing[key] = new_value
 
+  if coordinates(existing) is not None:
+    clear_approximation(existing)
+
   existing["last_seen"] = TODAY
   if "first_seen" not in existing:
     existing["first_seen"] = TODAY
@@ -115,87 +146,345 @@ def load_json(path: pathlib.Path) -> list[Hospital]:
 
 
 def save_json(path: pathlib.Path, records: list[Hospital]) -> None:
-  path.write_text(json.dumps(records, indent=2, ensure_ascii=False) + "\n")
+  write_json_atomic(path, records)
 
 
-def main() -> None:
-  existing = load_json(CURRENT_PATH)
-  scraped_primary = load_json(SCRAPED_PATH)
-  scraped_fallback = load_json(SCRAPED_FALLBACK_PATH)
+def dedupe_scraped(*batches: list[Hospital]) -> tuple[list[Hospital], Counter[str]]:
+  """Collapse scraped batches by merge key, keeping the first occurrence."""
 
   scraped: list[Hospital] = []
   seen_keys: set[str] = set()
   scraped_sources: Counter[str] = Counter()
+  for batch in batches:
+    for record in batch:
+      key = make_key(record)
+      if not key or key in seen_keys:
+        continue
+      scraped.append(record)
+      seen_keys.add(key)
+      scraped_sources.update(source_labels(record) or ["unknown"])
+  return scraped, scraped_sources
+
+
+class MergeIndex:
+  """Hash lookups from merge keys, ``id`` and ``aliases`` to canonical merge keys.
+
+  Exact merge keys always win. An alias or id claimed by two different
+  canonical records is ambiguous: it is recorded in ``collisions`` and no
+  longer used for matching, so a scraped record is never merged into the
+  wrong facility on the strength of a shared alias.
+  """
 
-  for record in scraped_primary:
-    key = make_key(record)
-    if not key or key in seen_keys:
-      continue
-    scraped.append(record)
-    seen_keys.add(key)
-    scraped_sources.update(source_labels(record) or ["unknown"])
+  def __init__(self) -> None:
+    self.keys: set[str] = set()
+    self.aliases: Dict[str, str] = {}
+    self.ids: Dict[str, str] = {}
+    self.collisions: list[tuple[str, str, str, str]] = []
+    self._ambiguous: set[tuple[str, str]] = set()
+
+  @classmethod
+  def from_items(cls, items: Iterable[tuple[str, Hospital]]) -> "MergeIndex":
+    index = cls()
+    for key, record in items:
+      index.add(key, record)
+    return index
+
+  def add(self, key: str, record: Hospital) -> None:
+    """Register ``record`` (stored under merge ``key``) with its id and aliases."""
+
+    if key in self.aliases and self.aliases[key] != key:
+      self.collisions.append(("alias", key, self.aliases[key], key))
+    self.keys.add(key)
+    for alias in name_keys(record):
+      if alias != key:
+        self._claim("alias", self.aliases, alias, key)
+    facility_id = str(record.get("id") or "").strip()
+    if facility_id:
+      self._claim("id", self.ids, facility_id, key)
+
+  def _claim(self, kind: str, table: Dict[str, str], value: str, key: str) -> None:
+    if (kind, value) in self._ambiguous:
+      return
+    owner = table.get(value)
+    if kind == "alias" and value in self.keys:
+      owner = value
+    if owner is None:
+      table[value] = key
+    elif owner != key:
+      self.collisions.append((kind, value, owner, key))
+      table.pop(value, None)
+      self._ambiguous.add((kind, value))
+
+  def resolve(self, record: Hospital) -> tuple[Optional[str], str]:
+    """Return the canonical merge key for ``record`` and how it matched (``key``, ``id``, ``alias``, ``new``)."""
 
-  for record in scraped_fallback:
     key = make_key(record)
-    if not key or key in seen_keys:
-      continue
-    scraped.append(record)
-    seen_keys.add(key)
-    scraped_sources.update(source_labels(record) or ["unknown"])
-
-  existing_map = {make_key(record): record for record in existing if make_key(record)}
-
-  new_count = 0
-  updated_count = 0
-  new_by_source: Counter[str] = Counter()
-  updated_by_source: Counter[str] = Counter()
-
+    if key in self.keys:
+      return key, "key"
+    facility_id = str(record.get("id") or "").strip()
+    if facility_id in self.ids:
+      return self.ids[facility_id], "id"
+    for candidate in name_keys(record):
+      if candidate in self.keys:
+        return candidate, "alias"
+      if candidate in self.aliases:
+        return self.aliases[candidate], "alias"
+    return None, "new"
+
+
+class MergeStats:
+  def __init__(self) -> None:
+    self.new_count = 0
+    self.updated_count = 0
+    self.new_by_source: Counter[str] = Counter()
+    self.updated_by_source: Counter[str] = Counter()
+    self.matched_by: Counter[str] = Counter()
+    self.collisions: list[tuple[str, str, str, str]] = []
+    # Each changed record's merge key -> the record before this merge (None if added), in first-touched order.
+    self.originals: Dict[str, Optional[Hospital]] = {}
+    self.changes: list[tuple[Optional[Hospital], Hospital]] = []
+
+
+def new_record(record: Hospital) -> Hospital:
+  record = dict(record)
+  record.setdefault("first_seen", TODAY)
+  record["last_seen"] = TODAY
+  remove_suggest_correction(record)
+  return record
+
+
+def merge_records(existing_map: Dict[str, Hospital], scraped: list[Hospital]) -> MergeStats:
+  """Merge scraped records into ``existing_map`` (keyed by ``make_key``) in place."""
+
+  stats = MergeStats()
+  index = MergeIndex.from_items(existing_map.items())
   for record in scraped:
     key = make_key(record)
     if not key:
       continue
 
-    if key in existing_map:
-      before = existing_map[key].copy()
-      update_record(existing_map[key], record)
-      if before != existing_map[key]:
-        updated_count += 1
-        updated_by_source.update(source_labels(record) or ["unknown"])
+    target, matched_by = index.resolve(record)
+    if target is not None:
+      if matched_by != "key":
+        stats.matched_by[matched_by] += 1
+      before = existing_map[target].copy()
+      update_record(existing_map[target], record)
+      if before != existing_map[target]:
+        stats.updated_count += 1
+        stats.updated_by_source.update(source_labels(record) or ["unknown"])
+        stats.originals.setdefault(target, before)
     else:
-      record = dict(record)
-      record.setdefault("first_seen", TODAY)
-      record["last_seen"] = TODAY
-      remove_suggest_correction(record)
-      existing_map[key] = record
-      new_count += 1
-      new_by_source.update(source_labels(record) or ["unknown"])
+      existing_map[key] = new_record(record)
+      index.add(key, existing_map[key])
+      stats.new_count += 1
+      stats.new_by_source.update(source_labels(record) or ["unknown"])
+      stats.originals[key] = None
+  stats.collisions = index.collisions
+  stats.changes = [(before, existing_map[key]) for key, before in stats.originals.items()]
+  return stats
 
-  merged_records = list(existing_map.values())
-  for record in merged_records:
-    remove_suggest_correction(record)
-  save_json(CURRENT_PATH, merged_records)
-  save_json(FULL_PATH, merged_records)
 
-  print(f"Existing records: {len(existing)}")
+def open_store(path: pathlib.Path | str = ":memory:") -> CatalogueStore:
+  """Open a :class:`CatalogueStore` that indexes each record's ``name_keys`` for merging."""
+
+  return CatalogueStore(path, alias_keys=name_keys)
+
+
+def resolve_in_store(store: CatalogueStore, record: Hospital) -> tuple[Optional[str], str]:
+  """:meth:`MergeIndex.resolve` against the store's indexed merge key, id and alias tables.
+
+  An id or alias carried by more than one stored record is ambiguous and is
+  skipped, as in :class:`MergeIndex`.
+  """
+
+  key = make_key(record)
+  if key in store:
+    return key, "key"
+  facility_id = str(record.get("id") or "").strip()
+  if facility_id:
+    owners = store.keys_for_id(facility_id)
+    if len(owners) == 1:
+      return owners[0], "id"
+  for candidate in name_keys(record):
+    if candidate in store:
+      return candidate, "alias"
+    owners = store.keys_for_alias(candidate)
+    if len(owners) == 1:
+      return owners[0], "alias"
+  return None, "new"
+
+
+def merge_into_store(store: CatalogueStore, scraped: list[Hospital], batch_size: int = 1000) -> MergeStats:
+  """Merge scraped records into a store opened with :func:`open_store`.
+
+  Each scraped record is resolved with indexed lookups (:func:`resolve_in_store`)
+  and only the row it matches is decoded, so the merge never loads the whole
+  catalogue. The same ``update_record`` rules as the JSON path apply, changed
+  rows are written back, and every ``batch_size`` records are committed as one
+  transaction; rows added earlier in a batch are visible to later lookups.
+  """
+
+  if store.alias_keys is None:
+    raise ValueError("merge_into_store needs a store opened with update_hospitals.open_store")
+  stats = MergeStats()
+  latest: Dict[str, Hospital] = {}
+  for start in range(0, len(scraped), batch_size):
+    with store.transaction():
+      for record in scraped[start:start + batch_size]:
+        key = make_key(record)
+        if not key:
+          continue
+        target, matched_by = resolve_in_store(store, record)
+        current = store.get(target) if target is not None else None
+        if current is not None:
+          if matched_by != "key":
+            stats.matched_by[matched_by] += 1
+          before = current.copy()
+          update_record(current, record)
+          if before != current:
+            stats.updated_count += 1
+            stats.updated_by_source.update(source_labels(record) or ["unknown"])
+            stats.originals.setdefault(target, before)
+            store.put(target, current, previous=before)
+            latest[target] = current
+        else:
+          latest[key] = new_record(record)
+          store.put(key, latest[key])
+          stats.new_count += 1
+          stats.new_by_source.update(source_labels(record) or ["unknown"])
+          stats.originals[key] = None
+  stats.collisions = store.shared_lookup_keys()
+  stats.changes = [(before, latest[key]) for key, before in stats.originals.items()]
+  return stats
+
+
+def fill_catalogue_coordinates(items: list[tuple[str, Hospital]]) -> tuple[list[tuple[str, Hospital]], Counter[str]]:
+  """Refresh centroid fills over the whole merged catalogue.
+
+  The gazetteer is built from every geocoded facility in the catalogue, not
+  just the latest scrape. Returns the ``(merge_key, record)`` pairs whose
+  approximation changed and the fill counts per precision level.
+  """
+
+  before = [tuple(record.get(field) for field in APPROX_FIELDS) for _, record in items]
+  filled = fill_missing_coordinates([record for _, record in items])
+  changed = [
+    (key, record)
+    for (key, record), previous in zip(items, before)
+    if tuple(record.get(field) for field in APPROX_FIELDS) != previous
+  ]
+  return changed, filled
+
+
+def print_summary(
+  existing_count: int,
+  scraped_primary: list[Hospital],
+  scraped_fallback: list[Hospital],
+  stats: MergeStats,
+  total: int,
+  scraped_sources: Counter[str],
+  geocoded: Counter[str],
+) -> None:
+  print(f"Existing records: {existing_count}")
   print(f"New scraped records: {len(scraped_primary)}")
   if scraped_fallback:
     print(f"Historical scrape records: {len(scraped_fallback)}")
-  print(f"Updated records: {updated_count}")
-  print(f"Newly added: {new_count}")
-  print(f"Total after merge: {len(merged_records)}")
+  print(f"Updated records: {stats.updated_count}")
+  print(f"Newly added: {stats.new_count}")
+  print(f"Total after merge: {total}")
+  if geocoded:
+    print("Approximate coordinates: " + ", ".join(f"{level}={count}" for level, count in sorted(geocoded.items())))
 
   if scraped_sources:
     print("Scraped source coverage (deduped records per source):")
     for name, count in scraped_sources.most_common():
       print(f"  - {name}: {count}")
-  if new_by_source:
+  if stats.new_by_source:
     print("New additions by source:")
-    for name, count in new_by_source.most_common():
+    for name, count in stats.new_by_source.most_common():
       print(f"  - {name}: {count}")
-  if updated_by_source:
+  if stats.updated_by_source:
     print("Updated records by source:")
-    for name, count in updated_by_source.most_common():
+    for name, count in stats.updated_by_source.most_common():
       print(f"  - {name}: {count}")
+  if stats.matched_by:
+    print("Matched without an exact key: " + ", ".join(f"{kind}={count}" for kind, count in stats.matched_by.most_common()))
+  if stats.collisions:
+    print(f"Merge index collisions (ignored for matching): {len(stats.collisions)}")
+    for kind, value, first, second in stats.collisions[:COLLISION_REPORT_LIMIT]:
+      print(f"  - {kind} {value!r} claimed by {first!r} and {second!r}")
+
+
+def run_store_merge(store_path: pathlib.Path, scraped_primary: list[Hospital], scraped_fallback: list[Hospital]) -> None:
+  """Merge scraped batches through the SQLite store at ``store_path``.
+
+  ``data/hospitals.json`` stays the source of truth. The store remembers the
+  digest of the file it last exported; when the file on disk differs (JSON
+  merge, ``watch.py`` or a hand edit since), the store is first reconciled
+  with it. The merge itself runs on indexed lookups. The catalogue is then
+  read once to refresh centroid fills and write the exports, which match
+  :func:`run_json_merge`.
+  """
+
+  scraped, scraped_sources = dedupe_scraped(scraped_primary, scraped_fallback)
+  basis = file_digest(CURRENT_PATH)
+  with open_store(store_path) as store:
+    synced_from = store.get_meta("catalogue")
+    if synced_from is None or synced_from != basis:
+      existing = load_json(CURRENT_PATH)
+      for record in existing:
+        remove_suggest_correction(record)
+      synced = store.reconcile((make_key(record), record) for record in existing if make_key(record))
+      if any(synced.values()):
+        print("Reconciled store with hospitals.json: " + ", ".join(f"{kind}={count}" for kind, count in synced.items() if count))
+    existing_count = len(store)
+    stats = merge_into_store(store, scraped)
+    items = list(store.iter_items())
+    changed, geocoded = fill_catalogue_coordinates(items)
+    store.upsert_many(changed)
+    records = [record for _, record in items]
+    save_json(CURRENT_PATH, records)
+    save_json(FULL_PATH, records)
+    store.set_meta("catalogue", file_digest(CURRENT_PATH))
+  refresh_facet_cube(FACETS_PATH, records, stats.changes, basis, file_digest(CURRENT_PATH))
+  print_summary(existing_count, scraped_primary, scraped_fallback, stats, len(records), scraped_sources, geocoded)
+
+
+def run_json_merge(scraped_primary: list[Hospital], scraped_fallback: list[Hospital]) -> MergeStats:
+  """Merge scraped batches into ``data/hospitals.json`` (and the full copy) in memory."""
+
+  basis = file_digest(CURRENT_PATH)
+  existing = load_json(CURRENT_PATH)
+  scraped, scraped_sources = dedupe_scraped(scraped_primary, scraped_fallback)
+  existing_map = {make_key(record): record for record in existing if make_key(record)}
+  stats = merge_records(existing_map, scraped)
+
+  merged_records = list(existing_map.values())
+  for record in merged_records:
+    remove_suggest_correction(record)
+  _, geocoded = fill_catalogue_coordinates(list(existing_map.items()))
+  save_json(CURRENT_PATH, merged_records)
+  save_json(FULL_PATH, merged_records)
+  refresh_facet_cube(FACETS_PATH, merged_records, stats.changes, basis, file_digest(CURRENT_PATH))
+  print_summary(len(existing), scraped_primary, scraped_fallback, stats, len(merged_records), scraped_sources, geocoded)
+  return stats
+
+
+def main(argv: list[str] | None = None) -> None:
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument(
+    "--sqlite",
+    type=pathlib.Path,
+    help="Merge through an indexed SQLite catalogue at this path (reconciled with data/hospitals.json when that changed).",
+  )
+  args = parser.parse_args(argv)
+
+  scraped_primary = load_json(SCRAPED_PATH)
+  scraped_fallback = load_json(SCRAPED_FALLBACK_PATH)
+  if args.sqlite:
+    run_store_merge(args.sqlite, scraped_primary, scraped_fallback)
+    return
+  run_json_merge(scraped_primary, scraped_fallback)
 
 
 if __name__ == "__main__":
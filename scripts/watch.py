@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""Long-lived watch mode: rebuild the catalogue when files land in ``data/raw/``.
+
+Curators otherwise rerun ``scrape_hospitals.py && update_hospitals.py`` by
+hand, paying interpreter start-up, parser imports and a full reparse every
+time. The watcher stays resident instead:
+
+- ``data/raw/`` is polled by ``stat`` only; a change is processed once the
+  directory looks the same on two consecutive polls, so half-copied drops are
+  not parsed.
+- Parsed, normalised rows are kept in memory per raw file and only changed or
+  new files are re-read; the stub scrapers run once. Heavy parsers stay
+  imported between runs.
+- Dedup, mapping and validation then rerun over the warm rows (merges cannot
+  be undone per file), in the same source order as a cold
+  ``scrape_hospitals.py`` run, so outputs match it.
+- Outputs are written through a temp file and rename, and the scraped
+  records are merged into ``data/hospitals.json`` as ``update_hospitals.py``
+  would. Each rebuild reports the latency from the file drop to the updated
+  catalogue.
+
+Run with ``python scripts/watch.py`` (``--no-merge`` stops at
+``data/hospitals_scraped_new.json``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import datetime as dt
+import pathlib
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import scrape_hospitals as pipeline
+import update_hospitals
+from id_registry import IdRegistry
+
+Hospital = Dict[str, Any]
+Signature = Tuple[int, int]
+
+
+class RawWatcher:
+  """Keeps parsed raw rows warm and rebuilds the exports when ``raw_dir`` changes."""
+
+  def __init__(
+    self,
+    raw_dir: pathlib.Path = pipeline.RAW_DIR,
+    output: pathlib.Path = pipeline.SCRAPED_OUTPUT,
+    engine: str = "sequence",
+    merge: bool = True,
+    scrapers: Optional[List[Callable[[], List[Hospital]]]] = None,
+    id_registry: Optional[IdRegistry] = None,
+  ) -> None:
+    self.raw_dir = raw_dir
+    self.output = output
+    self.engine = engine
+    self.merge = merge
+    self.scrapers = pipeline.SCRAPERS if scrapers is None else scrapers
+    self.id_registry = id_registry
+    self.rows: Dict[pathlib.Path, List[Hospital]] = {}
+    self.applied: Dict[pathlib.Path, Signature] = {}
+    self._scraper_rows: Optional[List[Hospital]] = None
+    self._pending: Optional[Dict[pathlib.Path, Signature]] = None
+    self._last_idle = time.time()
+
+  def scan(self) -> Dict[pathlib.Path, Signature]:
+    snapshot: Dict[pathlib.Path, Signature] = {}
+    for path in pipeline.iter_raw_files(self.raw_dir):
+      try:
+        stat = path.stat()
+      except FileNotFoundError:
+        continue
+      snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+    return snapshot
+
+  def poll(self) -> Optional[Dict[str, float]]:
+    """Rebuild if ``raw_dir`` changed and has settled; return the rebuild report, else None."""
+
+    snapshot = self.scan()
+    if snapshot == self.applied:
+      self._pending = None
+      self._last_idle = time.time()
+      return None
+    if snapshot != self._pending:
+      self._pending = snapshot
+      return None
+    return self.rebuild(snapshot)
+
+  def rebuild(self, snapshot: Optional[Dict[pathlib.Path, Signature]] = None) -> Dict[str, float]:
+    started = time.perf_counter()
+    snapshot = self.scan() if snapshot is None else snapshot
+    changed = [path for path, signature in snapshot.items() if self.applied.get(path) != signature]
+    for path in set(self.rows) - set(snapshot):
+      del self.rows[path]
+    for path in changed:
+      self._parse(path)
+    if self._scraper_rows is None:
+      self._scraper_rows = [row for scraper in self.scrapers for row in scraper()]
+
+    # Both modules stamp dates from a module-level TODAY taken at import; keep it current.
+    pipeline.TODAY = update_hospitals.TODAY = dt.date.today().isoformat()
+    # Dedup and validation mutate records, so every run works on fresh copies of the warm rows.
+    warm = [row for path in sorted(self.rows) for row in self.rows[path]] + self._scraper_rows
+    deduped = pipeline.stage_dedup(copy.deepcopy(warm), self.engine)
+    records = pipeline.stage_validate(pipeline.stage_map(deduped), self.id_registry)
+    pipeline.save_records(records, self.output)
+    if self.id_registry is not None:
+      self.id_registry.save()
+    if self.merge:
+      update_hospitals.run_json_merge(records, [])
+    self.applied = snapshot
+    self._pending = None
+
+    finished = time.time()
+    dropped = max((snapshot[path][1] / 1e9 for path in changed), default=finished)
+    report = {
+      "changed": len(changed),
+      "records": len(records),
+      "rebuild_seconds": time.perf_counter() - started,
+      "latency_seconds": finished - max(dropped, self._last_idle),
+    }
+    self._last_idle = finished
+    return report
+
+  def _parse(self, path: pathlib.Path) -> None:
+    if pipeline.sniff_format(path) not in pipeline.LOADERS:
+      self.rows.pop(path, None)
+      return
+    source = pipeline.Source(path.stem, path=path)
+    try:
+      self.rows[path] = list(pipeline.stage_normalize((source.label, row) for row in source.rows()))
+    except Exception as exc:  # a bad drop must not take the watcher down
+      print(f"Skipping {path.name}: {exc}")
+      self.rows.pop(path, None)
+
+
+def describe(report: Dict[str, float], target: pathlib.Path) -> str:
+  return (
+    f"Rebuilt {int(report['records'])} facilities from {int(report['changed'])} changed file(s) "
+    f"in {report['rebuild_seconds']:.2f}s; drop → {target.name} in {report['latency_seconds']:.2f}s"
+  )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+  parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+  parser.add_argument("--raw-dir", type=pathlib.Path, default=pipeline.RAW_DIR)
+  parser.add_argument("--interval", type=float, default=2.0, help="Seconds between polls")
+  parser.add_argument("--match-engine", choices=pipeline.MATCH_ENGINES, default="sequence")
+  parser.add_argument("--no-merge", action="store_true", help="Only write the scraped export, skip update_hospitals")
+  args = parser.parse_args(argv)
+
+  pipeline.fetch_remote_sources()
+  watcher = RawWatcher(args.raw_dir, engine=args.match_engine, merge=not args.no_merge, id_registry=IdRegistry.load())
+  target = pipeline.SCRAPED_OUTPUT if args.no_merge else update_hospitals.CURRENT_PATH
+  print(describe(watcher.rebuild(), target))
+  print(f"Watching {args.raw_dir} every {args.interval:g}s (Ctrl-C to stop)")
+  try:
+    while True:
+      time.sleep(args.interval)
+      report = watcher.poll()
+      if report is not None:
+        print(describe(report, target))
+  except KeyboardInterrupt:
+    pass
+
+
+if __name__ == "__main__":
+  main()
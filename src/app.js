@@ -31,6 +31,7 @@ const state = {
   location: null,
   locationError: '',
   activeQuickFilter: null,
+  facets: null,
 };
 
 let renderQueued = false;
@@ -302,6 +303,15 @@ const adminSponsorLabel = document.getElementById('admin-sponsor-label');
 const adminFeaturedRank = document.getElementById('admin-featured-rank');
 const adminFeaturedUntil = document.getElementById('admin-featured-until');
 
+// Exact coordinates only; centroid fills from scripts/geocode.py live in approx_lat/approx_lon.
+const exactPoint = (hospital) =>
+  typeof hospital.lat === 'number' && typeof hospital.lon === 'number' ? [hospital.lat, hospital.lon] : null;
+
+const approximatePoint = (hospital) =>
+  typeof hospital.approx_lat === 'number' && typeof hospital.approx_lon === 'number'
+    ? [hospital.approx_lat, hospital.approx_lon]
+    : null;
+
 const haversineDistance = (lat1, lon1, lat2, lon2) => {
   const toRad = (deg) => (deg * Math.PI) / 180;
   const R = 6371;
@@ -316,6 +326,24 @@ const haversineDistance = (lat1, lon1, lat2, lon2) => {
 
 const formatVerification = (hospital) => getVerificationMeta(hospital);
 
+// Per-option counts from data/facets.json (written by scripts/facets.py); labels stay plain until it loads.
+const facetLabel = (field, value, label = value) => {
+  const counts = state.facets && state.facets.facets ? state.facets.facets[field] : null;
+  return counts && typeof counts[value] === 'number' ? `${label} (${counts[value]})` : label;
+};
+
+const loadFacets = () => {
+  if (typeof fetch !== 'function') return;
+  fetch('data/facets.json')
+    .then((response) => (response.ok ? response.json() : null))
+    .then((facets) => {
+      if (!facets || !facets.facets) return;
+      state.facets = facets;
+      renderFilters();
+    })
+    .catch(() => {});
+};
+
 const renderFilters = () => {
   const provinces = new Set();
   const ownerships = new Set();
@@ -335,19 +363,19 @@ const renderFilters = () => {
     '<option value="">All provinces</option>' +
     Array.from(provinces)
       .sort()
-      .map((province) => `<option value="${province}">${province}</option>`)
+      .map((province) => `<option value="${province}">${facetLabel('province', province)}</option>`)
       .join('');
   ownershipFilter.innerHTML =
     '<option value="">All ownership</option>' +
     Array.from(ownerships)
       .sort()
-      .map((owner) => `<option value="${owner}">${owner}</option>`)
+      .map((owner) => `<option value="${owner}">${facetLabel('ownership', owner)}</option>`)
       .join('');
   facilityFilter.innerHTML =
     '<option value="">All facilities</option>' +
     Array.from(facilities)
       .sort()
-      .map((facility) => `<option value="${facility}">${facility}</option>`)
+      .map((facility) => `<option value="${facility}">${facetLabel('facility_type', facility)}</option>`)
       .join('');
   tierFilter.innerHTML =
     '<option value="">All tiers</option>' +
@@ -359,7 +387,7 @@ const renderFilters = () => {
     '<option value="">All services</option>' +
     Array.from(services)
       .sort()
-      .map((service) => `<option value="${service}">${formatServiceLabel(service)}</option>`)
+      .map((service) => `<option value="${service}">${facetLabel('services', service, formatServiceLabel(service))}</option>`)
       .join('');
   ruralFilter.innerHTML =
     '<option value="">Any location</option>' +
@@ -367,6 +395,13 @@ const renderFilters = () => {
       .sort()
       .map((value) => `<option value="${value}">${value}</option>`)
       .join('');
+  // Re-rendering (e.g. once facet counts arrive) must not drop the current selection.
+  provinceFilter.value = state.filters.province;
+  ownershipFilter.value = state.filters.ownership;
+  facilityFilter.value = state.filters.facilityType;
+  tierFilter.value = state.filters.tier;
+  serviceFilter.value = state.filters.service;
+  ruralFilter.value = state.filters.ruralUrban;
 };
 
 const formatServiceLabel = (service = '') => {
@@ -484,7 +519,11 @@ const renderList = (filtered, targetEl, { featured = false } = {}) => {
     }
 
     const distanceLabel =
-      state.location && hospital.distance !== null ? ` · ${hospital.distance.toFixed(1)} km away` : '';
+      state.location && hospital.distance !== null
+        ? hospital.distanceApproximate
+          ? ` · ~${hospital.distance.toFixed(0)} km away (approximate ${hospital.geo_precision || 'area'})`
+          : ` · ${hospital.distance.toFixed(1)} km away`
+        : '';
     node.querySelector('.card__meta').textContent =
       `${hospital.facility_type || 'Health facility'} · ${hospital.district}, ${hospital.province}${distanceLabel}`;
 
@@ -604,14 +643,15 @@ const renderHospitals = () => {
     return;
   }
 
-  const enriched = state.hospitals.map((hospital) => ({
-    ...hospital,
-    tier: tierHelper(hospital),
-    distance:
-      state.location && typeof hospital.lat === 'number' && typeof hospital.lon === 'number'
-        ? haversineDistance(state.location.lat, state.location.lon, hospital.lat, hospital.lon)
-        : null,
-  }));
+  const enriched = state.hospitals.map((hospital) => {
+    const point = exactPoint(hospital) || approximatePoint(hospital);
+    return {
+      ...hospital,
+      tier: tierHelper(hospital),
+      distance: state.location && point ? haversineDistance(state.location.lat, state.location.lon, point[0], point[1]) : null,
+      distanceApproximate: !exactPoint(hospital),
+    };
+  });
 
   const filtered = enriched
     .filter((hospital) => {
@@ -920,6 +960,7 @@ const updateQuickFilterUI = () => {
 const init = () => {
   state.hospitals = applyAdminOverrides(state.hospitals);
   renderFilters();
+  loadFacets();
   renderQuickFilters();
   renderHospitals();
   initAdminPanel();
@@ -0,0 +1,30 @@
+import json
+import sys
+import tempfile
+from pathlib import Path
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "scripts"))
+
+from scripts.atomic_io import atomic_open, temp_path, write_json_atomic  # noqa: E402
+
+
+class AtomicIoTests(unittest.TestCase):
+  def test_failed_write_keeps_target_and_cleans_up(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      path = Path(tmp) / "hospitals.json"
+      write_json_atomic(path, [{"name": "Gutu Clinic"}])
+      with self.assertRaises(RuntimeError):
+        with atomic_open(path) as fh:
+          fh.write("[{")
+          raise RuntimeError("writer died")
+      self.assertEqual(json.loads(path.read_text()), [{"name": "Gutu Clinic"}])
+      self.assertEqual([p.name for p in Path(tmp).iterdir()], ["hospitals.json"])
+      # Concurrent writers of one target get distinct temp files.
+      self.assertNotEqual(temp_path(path), temp_path(path))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,44 @@
+import json
+import sys
+import tempfile
+from pathlib import Path
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "scripts"))
+
+from scripts.build_pages import build_pages, render_page  # noqa: E402
+
+RECORDS = [
+  {"id": "gutu-clinic-gutu", "name": "Gutu Clinic", "province": "Masvingo", "district": "Gutu", "last_updated_at": "2025-11-20"},
+  {"id": "mpilo-central-hospital", "name": "Mpilo <Central> Hospital", "province": "Bulawayo", "phone": "+263 9 212011"},
+]
+
+
+class BuildPagesTests(unittest.TestCase):
+  def test_incremental_rebuild(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      site = Path(tmp)
+      self.assertEqual(build_pages(RECORDS, site)["written"], 2)
+      self.assertEqual(build_pages(RECORDS, site)["unchanged"], 2)
+
+      changed = [dict(RECORDS[0], phone="+263 39 22222")]
+      stats = build_pages(changed, site)
+      self.assertEqual((stats["written"], stats["removed"]), (1, 1))
+      self.assertFalse((site / "facility" / "mpilo-central-hospital").exists())
+      self.assertIn("+263 39 22222", (site / "facility" / "gutu-clinic-gutu" / "index.html").read_text())
+      self.assertEqual(json.loads((site / "facility" / "manifest.json").read_text()).keys(), {"gutu-clinic-gutu"})
+
+      sitemap = (site / "sitemap.xml").read_text()
+      self.assertIn("<loc>https://hospitals.co.zw/facility/gutu-clinic-gutu/</loc>", sitemap)
+      self.assertNotIn("mpilo", sitemap)
+
+  def test_page_escapes_record_text(self):
+    page = render_page(RECORDS[1])
+    self.assertIn("<h1>Mpilo &lt;Central&gt; Hospital</h1>", page)
+    self.assertIn('href="tel:+2639212011"', page)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,137 @@
+import json
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "scripts"))
+
+from scripts.catalogue_store import CatalogueStore  # noqa: E402
+import scripts.update_hospitals as update_hospitals  # noqa: E402
+from scripts.update_hospitals import MergeIndex, make_key, merge_into_store, merge_records, open_store  # noqa: E402
+
+
+def sample_records():
+  return [
+    {"id": "a", "name": "Mpilo Central Hospital", "city": "Bulawayo", "province": "Bulawayo", "district": "Bulawayo",
+     "facility_type": "Central Hospital", "tier": "Tier 1", "services": ["ER", "ICU"], "phone": None},
+    {"id": "b", "name": "Gutu Clinic", "city": "Gutu", "province": "Masvingo", "district": "Gutu",
+     "facility_type": "Clinic", "tier": "Tier 3", "services": ["OPD"]},
+  ]
+
+
+class CatalogueStoreTests(unittest.TestCase):
+  def test_query_uses_filters_and_services(self):
+    with CatalogueStore() as store:
+      store.upsert_many((make_key(r), r) for r in sample_records())
+      self.assertEqual([r["id"] for r in store.query(province="Masvingo")], ["b"])
+      self.assertEqual([r["id"] for r in store.query(service="ICU")], ["a"])
+      self.assertEqual(store.query(facility_type="Clinic", tier="Tier 1"), [])
+      self.assertEqual(store.get_by_id("a")["name"], "Mpilo Central Hospital")
+
+  def test_store_merge_matches_json_merge(self):
+    scraped = [
+      {"name": "Mpilo Central Hospital", "city": "Bulawayo", "phone": "+263 9 212011", "services": ["Lab"]},
+      {"name": "Bindura Provincial Hospital", "city": "Bindura", "province": "Mashonaland Central"},
+    ]
+    existing_map = {make_key(r): r for r in sample_records()}
+    json_stats = merge_records(existing_map, [dict(r) for r in scraped])
+
+    with open_store() as store:
+      store.upsert_many((make_key(r), r) for r in sample_records())
+      with mock.patch.object(store, "iter_items", side_effect=AssertionError("merge should not scan the store")):
+        store_stats = merge_into_store(store, [dict(r) for r in scraped], batch_size=1)
+      self.assertEqual(list(store.iter_records()), list(existing_map.values()))
+    self.assertEqual((store_stats.new_count, store_stats.updated_count), (json_stats.new_count, json_stats.updated_count))
+
+  def test_aliases_and_ids_resolve_to_canonical_record(self):
+    existing = sample_records()
+    existing[1]["aliases"] = ["Gutu Rural Clinic"]
+    scraped = [
+      {"name": "Gutu Rural Clinic", "city": "Gutu", "phone": "+263 30 2222"},
+      {"id": "a", "name": "Mpilo Hospital", "city": "Bulawayo", "email": "info@mpilo.example"},
+    ]
+    existing_map = {make_key(r): r for r in existing}
+    stats = merge_records(existing_map, [dict(r) for r in scraped])
+    self.assertEqual((stats.new_count, stats.updated_count), (0, 2))
+    self.assertEqual(stats.matched_by, {"alias": 1, "id": 1})
+    self.assertEqual(existing_map[make_key(existing[1])]["phone"], "+263 30 2222")
+
+    with open_store() as store:
+      seeded = sample_records()
+      seeded[1]["aliases"] = ["Gutu Rural Clinic"]
+      store.upsert_many((make_key(r), r) for r in seeded)
+      store_stats = merge_into_store(store, [dict(r) for r in scraped])
+      self.assertEqual(list(store.iter_records()), list(existing_map.values()))
+    self.assertEqual(store_stats.matched_by, stats.matched_by)
+
+    shared = [
+      ("x::gutu", {"id": "x", "name": "X", "city": "Gutu", "aliases": ["Mission"]}),
+      ("y::gutu", {"id": "x", "name": "Y", "city": "Gutu", "aliases": ["Mission"]}),
+    ]
+    with open_store() as store:
+      store.upsert_many(shared)
+      self.assertEqual(sorted(store.shared_lookup_keys()), [("alias", "mission::gutu", "x::gutu", "y::gutu"), ("id", "x", "x::gutu", "y::gutu")])
+      self.assertEqual(update_hospitals.resolve_in_store(store, {"id": "x", "name": "Mission", "city": "Gutu"}), (None, "new"))
+
+    index = MergeIndex.from_items(shared)
+    self.assertEqual({kind for kind, *_ in index.collisions}, {"id", "alias"})
+    self.assertEqual(index.resolve({"name": "Mission", "city": "Gutu"}), (None, "new"))
+
+  def test_store_run_keeps_records_added_outside_the_store(self):
+    catalogue = sample_records() + [
+      {"id": "c", "name": "Chivi Clinic", "city": "Chivi", "verified_text": "Verified 2024",
+       "links": ["https://example.org", "Suggest correction"]},
+    ]
+    scraped = [{"name": "Bindura Provincial Hospital", "city": "Bindura", "province": "Mashonaland Central"}]
+    with tempfile.TemporaryDirectory() as tmp:
+      tmp = Path(tmp)
+      outputs = []
+      for run in ("json", "store"):
+        current = tmp / f"{run}.json"
+        current.write_text(json.dumps(catalogue))
+        paths = {"CURRENT_PATH": current, "FULL_PATH": tmp / f"{run}_full.json", "FACETS_PATH": tmp / f"{run}_facets.json"}
+        with mock.patch.multiple(update_hospitals, **paths), mock.patch("builtins.print"):
+          if run == "json":
+            update_hospitals.run_json_merge([dict(r) for r in scraped], [])
+          else:
+            # A store that only knows the first facility, as after JSON-path or hand edits.
+            with CatalogueStore(tmp / "catalogue.sqlite") as store:
+              store.upsert_many([(make_key(catalogue[0]), catalogue[0])])
+            update_hospitals.run_store_merge(tmp / "catalogue.sqlite", [dict(r) for r in scraped], [])
+        outputs.append(json.loads(current.read_text()))
+    self.assertEqual(outputs[0], outputs[1])
+    self.assertEqual([r["name"] for r in outputs[1]][:3], ["Mpilo Central Hospital", "Gutu Clinic", "Chivi Clinic"])
+    self.assertEqual(outputs[1][2]["links"], ["https://example.org"])
+
+  def test_store_run_reconciles_only_after_outside_edits(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      tmp = Path(tmp)
+      current = tmp / "hospitals.json"
+      current.write_text(json.dumps(sample_records()))
+      paths = {"CURRENT_PATH": current, "FULL_PATH": tmp / "full.json", "FACETS_PATH": tmp / "facets.json"}
+      store_class = update_hospitals.CatalogueStore
+
+      def run(scraped):
+        update_hospitals.run_store_merge(tmp / "catalogue.sqlite", scraped, [])
+        return json.loads(current.read_text())
+
+      with mock.patch.multiple(update_hospitals, **paths), mock.patch("builtins.print"), \
+          mock.patch.object(store_class, "reconcile", autospec=True, side_effect=store_class.reconcile) as reconcile:
+        run([])
+        self.assertEqual(reconcile.call_count, 1)
+        run([{"name": "Gutu Clinic", "city": "Gutu", "phone": "+263 30 2222"}])
+        self.assertEqual(reconcile.call_count, 1)
+        edited = json.loads(current.read_text())
+        edited[0]["phone"] = "+263 9 000000"
+        current.write_text(json.dumps(edited))
+        merged = run([])
+        self.assertEqual(reconcile.call_count, 2)
+    self.assertEqual([r["phone"] for r in merged], ["+263 9 000000", "+263 30 2222"])
+
+
+if __name__ == "__main__":
+  unittest.main()
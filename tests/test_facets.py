@@ -0,0 +1,98 @@
+import json
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "scripts"))
+
+import scripts.update_hospitals as update_hospitals  # noqa: E402
+from scripts.facets import FacetCube, refresh_facet_cube  # noqa: E402
+
+RECORDS = [
+  {"id": "a", "province": "Harare", "facility_type": "Clinic", "services": ["OPD", "HIV"], "open_24h": False, "tier": "Tier 3"},
+  {"id": "b", "province": "Harare", "facility_type": "Central Hospital", "services": ["ER", "ICU"], "open_24h": True, "tier": "Tier 1"},
+  {"id": "c", "province": "Midlands", "facility_type": "Clinic", "services": ["OPD"], "open_24h": False, "medical_aids": ["CIMAS"]},
+]
+
+
+class FacetCubeTests(unittest.TestCase):
+  def test_single_and_pair_counts(self):
+    cube = FacetCube.from_records(RECORDS)
+    self.assertEqual(cube.count(), 3)
+    self.assertEqual(cube.count(province="Harare"), 2)
+    self.assertEqual(cube.count(services="OPD"), 2)
+    self.assertEqual(cube.count(facility_type="Clinic", province="Harare"), 1)
+    self.assertEqual(cube.count(services="ER", open_24h=True), 1)
+    with self.assertRaises(KeyError):
+      cube.count(tier="Tier 1", medical_aids="CIMAS")
+
+  def test_filter_values_bucket_like_records(self):
+    cube = FacetCube.from_records(RECORDS + [{"id": "d", "open_24h": "No"}, {"id": "e", "open_24h": "yes"}])
+    self.assertEqual(cube.count(open_24h=True), 2)
+    for value in (False, "false", "False", "no", 0):
+      self.assertEqual(cube.count(open_24h=value), 3, value)
+
+  def test_refresh_writes_rebuilt_cube(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      path = Path(tmp) / "facets.json"
+      refresh_facet_cube(path, RECORDS)
+      cube = refresh_facet_cube(path, RECORDS[1:])
+      self.assertEqual(json.loads(path.read_text()), FacetCube.from_records(RECORDS[1:]).to_json())
+      self.assertEqual(cube.count(province="Harare"), 1)
+
+  def test_changes_patch_the_saved_cube(self):
+    moved = dict(RECORDS[0], province="Midlands", services=["OPD"])
+    added = {"id": "d", "province": "Harare", "facility_type": "Clinic", "open_24h": "yes"}
+    changes = [(RECORDS[0], moved), (None, added), (RECORDS[2], dict(RECORDS[2], phone="+263 54 1"))]
+    current = [moved, RECORDS[1], RECORDS[2], added]
+    with tempfile.TemporaryDirectory() as tmp:
+      path = Path(tmp) / "facets.json"
+      refresh_facet_cube(path, RECORDS, catalogue="v1")
+      untouched = mock.MagicMock(side_effect=AssertionError("records should not be read"))
+      cube = refresh_facet_cube(path, untouched, changes, basis="v1", catalogue="v2")
+      expected = FacetCube.from_records(current)
+      expected.catalogue = "v2"
+      self.assertEqual(json.loads(path.read_text()), expected.to_json())
+      self.assertEqual(cube.count(province="Midlands", services="HIV"), 0)
+      # A cube written for another catalogue (e.g. after a hand edit) is rebuilt.
+      cube = refresh_facet_cube(path, RECORDS, changes, basis="v1", catalogue="v3")
+      self.assertEqual(cube.count(), 3)
+
+  def test_merge_updates_cube_incrementally(self):
+    catalogue = [
+      {"name": "Gutu Clinic", "city": "Gutu", "province": "Masvingo", "facility_type": "Clinic", "services": ["OPD"]},
+      {"name": "Chivi Clinic", "city": "Chivi", "province": "Masvingo", "facility_type": "Clinic"},
+    ]
+    rebuild_from = FacetCube.from_records
+    with tempfile.TemporaryDirectory() as tmp:
+      tmp = Path(tmp)
+      current = tmp / "hospitals.json"
+      current.write_text(json.dumps(catalogue))
+      paths = {"CURRENT_PATH": current, "FULL_PATH": tmp / "full.json", "FACETS_PATH": tmp / "facets.json"}
+      rebuild = mock.Mock(side_effect=rebuild_from)
+      with mock.patch.multiple(update_hospitals, **paths), mock.patch("builtins.print"), \
+          mock.patch("facets.FacetCube.from_records", rebuild):
+        update_hospitals.run_json_merge([{"name": "Gutu Clinic", "city": "Gutu", "phone": "+263 30 1"}], [])
+        self.assertEqual(rebuild.call_count, 1)
+        update_hospitals.run_json_merge([
+          {"name": "Chivi Clinic", "city": "Chivi", "services": ["ER"], "open_24h": True},
+          {"name": "Zaka Clinic", "city": "Zaka", "province": "Masvingo", "facility_type": "Clinic"},
+        ], [])
+        update_hospitals.run_store_merge(tmp / "catalogue.sqlite", [{"name": "Mashoko Hospital", "city": "Mashoko"}], [])
+        self.assertEqual(rebuild.call_count, 1)
+        saved = json.loads(paths["FACETS_PATH"].read_text())
+        self.assertEqual(saved, dict(rebuild_from(json.loads(current.read_text())).to_json(), catalogue=saved["catalogue"]))
+        self.assertEqual(saved["total"], 4)
+
+        current.write_text(json.dumps(catalogue))
+        update_hospitals.run_json_merge([], [])
+        self.assertEqual(rebuild.call_count, 2)
+        self.assertEqual(json.loads(paths["FACETS_PATH"].read_text())["total"], 2)
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,80 @@
+import json
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "scripts"))
+
+from scripts.geocode import APPROX_FIELDS, Gazetteer, fill_missing_coordinates  # noqa: E402
+import scripts.update_hospitals as update_hospitals  # noqa: E402
+from scripts.update_hospitals import update_record  # noqa: E402
+
+
+class GeocodeTests(unittest.TestCase):
+  def test_fills_from_most_precise_centroid(self):
+    records = [
+      {"name": "A", "province": "Harare", "district": "Harare", "city": "Chitungwiza", "lat": -18.0, "lon": 31.0},
+      {"name": "B", "province": "Harare", "district": "Harare", "city": "Chitungwiza", "lat": -18.2, "lon": 31.2},
+      {"name": "C", "province": "Harare", "district": "Harare", "city": "Harare", "lat": "-17.8", "lon": "31.05"},
+      {"name": "D", "province": "Harare", "district": "Harare", "city": "Chitungwisa", "lat": None, "lon": None},
+      {"name": "E", "province": "Harare", "district": "Harare", "city": "Epworth", "lat": None, "lon": None},
+      {"name": "F", "province": "Harare", "city": "Unknown Village", "lat": None, "lon": None},
+      {"name": "G", "province": "Midlands", "city": "Gweru", "lat": None, "lon": None},
+    ]
+    filled = fill_missing_coordinates(records)
+    self.assertEqual(dict(filled), {"city": 1, "district": 1, "province": 1, "unresolved": 1})
+    self.assertEqual((records[3]["approx_lat"], records[3]["approx_lon"], records[3]["geo_precision"]), (-18.1, 31.1, "city"))
+    self.assertIsNone(records[3]["lat"])
+    self.assertEqual(records[4]["geo_precision"], "district")
+    self.assertEqual(records[5]["geo_precision"], "province")
+    self.assertNotIn("approx_lat", records[6])
+    self.assertNotIn("geo_precision", records[0])
+
+  def test_merge_prefers_real_coordinates_over_centroid(self):
+    existing = {"name": "Gutu Clinic", "city": "Gutu", "lat": None, "lon": None,
+                "approx_lat": -19.9, "approx_lon": 31.0, "geo_precision": "district"}
+    update_record(existing, {"name": "Gutu Clinic", "city": "Gutu", "lat": -19.65, "lon": 31.16})
+    self.assertEqual((existing["lat"], existing["lon"]), (-19.65, 31.16))
+    self.assertFalse(set(APPROX_FIELDS) & set(existing))
+    # A later scrape without coordinates cannot bring the centroid back.
+    update_record(existing, {"name": "Gutu Clinic", "city": "Gutu", "approx_lat": -19.9, "approx_lon": 31.0, "geo_precision": "district"})
+    self.assertFalse(set(APPROX_FIELDS) & set(existing))
+
+  def test_lookup_ignores_other_provinces(self):
+    gazetteer = Gazetteer.from_records([{"province": "Manicaland", "city": "Mutare", "lat": -18.97, "lon": 32.67}])
+    self.assertIsNone(gazetteer.lookup({"province": "Midlands", "city": "Mutare"}))
+
+  def test_merge_fills_catalogue_from_its_own_geocoded_records(self):
+    catalogue = [
+      {"name": "Gutu Mission Hospital", "province": "Masvingo", "district": "Gutu", "city": "Gutu", "lat": -19.7, "lon": 31.1},
+      {"name": "Gutu Clinic", "province": "Masvingo", "district": "Gutu", "city": "Gutu"},
+      {"name": "Chivi Clinic", "province": "Masvingo", "district": "Chivi", "city": "Chivi"},
+    ]
+    scraped = [{"name": "Mupandawana Clinic", "province": "Masvingo", "district": "Gutu", "city": "Gutu"}]
+    with tempfile.TemporaryDirectory() as tmp:
+      tmp = Path(tmp)
+      outputs = []
+      for run in ("json", "store"):
+        current = tmp / f"{run}.json"
+        current.write_text(json.dumps(catalogue))
+        paths = {"CURRENT_PATH": current, "FULL_PATH": tmp / f"{run}_full.json", "FACETS_PATH": tmp / f"{run}_facets.json"}
+        with mock.patch.multiple(update_hospitals, **paths), mock.patch("builtins.print"):
+          if run == "json":
+            update_hospitals.run_json_merge([dict(r) for r in scraped], [])
+          else:
+            update_hospitals.run_store_merge(tmp / "catalogue.sqlite", [dict(r) for r in scraped], [])
+        outputs.append(json.loads(current.read_text()))
+    self.assertEqual(outputs[0], outputs[1])
+    fills = {r["name"]: (r.get("approx_lat"), r.get("geo_precision")) for r in outputs[0]}
+    self.assertEqual(fills["Gutu Clinic"], (-19.7, "city"))
+    self.assertEqual(fills["Mupandawana Clinic"], (-19.7, "city"))
+    self.assertEqual(fills["Chivi Clinic"], (-19.7, "province"))
+    self.assertEqual(fills["Gutu Mission Hospital"], (None, None))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,97 @@
+"""Hermetic end-to-end run over the committed ``data/raw/`` corpus.
+
+Every raw drop (JSON, the HTML ``mcaz.xls``, XLSX and the Alliance PDF) plus
+the stub scrapers feed the pipeline, with the date pinned. The golden file
+holds the exported records and, per raw file, the count and digest of the
+parsed rows, so a loader regression shows up even for drops whose rows do not
+survive normalisation. The run is offline: the PDF is "downloaded" from
+``data/raw/`` through ``fixture_transport`` and any other remote attachment
+fails like an unreachable host. The test is skipped when a parser from
+``requirements.txt`` is missing, since the output would then lack rows.
+
+Set ``UPDATE_GOLDEN=1`` to rewrite ``tests/golden/pipeline_output.json`` after
+an intended output change. Set ``GOLDEN_RUNTIME_LOG=path.jsonl`` to append
+each run's wall time there for regression tracking.
+"""
+
+import datetime as dt
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "scripts"))
+
+import scripts.scrape_hospitals as pipeline  # noqa: E402
+
+CORPUS = ROOT / "data" / "raw"
+GOLDEN_PATH = Path(__file__).resolve().parent / "golden" / "pipeline_output.json"
+PINNED_TODAY = "2025-01-01"
+PARSERS = {
+  "beautifulsoup4": pipeline.BS4_AVAILABLE,
+  "openpyxl": pipeline.OPENPYXL_AVAILABLE,
+  "pdfplumber": pipeline.PDFPLUMBER_AVAILABLE,
+  "xlrd": pipeline.XLRD_AVAILABLE,
+}
+MISSING_PARSERS = sorted(name for name, available in PARSERS.items() if not available)
+
+
+class GoldenPipelineTests(unittest.TestCase):
+  @unittest.skipIf(MISSING_PARSERS, f"parsers not installed: {', '.join(MISSING_PARSERS)}")
+  def test_offline_run_matches_golden(self):
+    alliance = pipeline.REMOTE_RAW_SOURCES["alliance_providers_pdf"]["filename"]
+    with tempfile.TemporaryDirectory() as tmp:
+      raw_dir = Path(tmp) / "raw"
+      shutil.copytree(CORPUS, raw_dir, ignore=lambda _, names: [alliance] if alliance in names else [])
+      checkpoints = pipeline.StageCheckpoints(Path(tmp) / "stages")
+
+      env = {"ALLOW_REMOTE_FAILURES": "", "REQUIRE_REMOTE_ATTACHMENTS": ""}
+      with mock.patch.object(pipeline, "TODAY", PINNED_TODAY), mock.patch.dict(os.environ, env), \
+          mock.patch("builtins.print"):
+        started = time.perf_counter()
+        records = pipeline.run_pipeline(None, checkpoints, raw_dir, transport=pipeline.fixture_transport(CORPUS))
+        elapsed = time.perf_counter() - started
+
+      self.assertEqual((raw_dir / alliance).read_bytes(), (CORPUS / alliance).read_bytes())
+      sources = {}
+      for cache in sorted((Path(tmp) / "stages" / "sources").glob("*.jsonl")):
+        lines = cache.read_bytes()
+        sources[cache.stem] = {"rows": lines.count(b"\n"), "sha1": hashlib.sha1(lines).hexdigest()}
+
+    golden = {"sources": sources, "records": records}
+    output = json.dumps(golden, indent=2, ensure_ascii=False, sort_keys=True) + "\n"
+    if os.getenv("UPDATE_GOLDEN"):
+      GOLDEN_PATH.write_text(output, encoding="utf-8")
+    self.maxDiff = None
+    self.assertEqual(json.loads(output), json.loads(GOLDEN_PATH.read_text(encoding="utf-8")))
+
+    if os.getenv("GOLDEN_RUNTIME_LOG"):
+      with open(os.environ["GOLDEN_RUNTIME_LOG"], "a", encoding="utf-8") as log:
+        log.write(json.dumps({
+          "at": dt.datetime.now().isoformat(timespec="seconds"),
+          "records": len(records),
+          "seconds": round(elapsed, 4),
+        }) + "\n")
+
+  def test_fixture_transport_stays_offline(self):
+    transport = pipeline.fixture_transport(None)
+    for meta in pipeline.REMOTE_RAW_SOURCES.values():
+      with self.assertRaises(ConnectionError):
+        transport(meta["url"])
+    with tempfile.TemporaryDirectory() as tmp:
+      with mock.patch.dict(os.environ, {"REQUIRE_REMOTE_ATTACHMENTS": "1", "ALLOW_REMOTE_FAILURES": ""}):
+        with self.assertRaises(RuntimeError):
+          pipeline.fetch_remote_sources(transport, Path(tmp))
+      self.assertEqual(list(Path(tmp).iterdir()), [])
+
+
+if __name__ == "__main__":
+  unittest.main()
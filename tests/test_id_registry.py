@@ -0,0 +1,64 @@
+import json
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "scripts"))
+
+from scripts.id_registry import IdRegistry, assign_ids  # noqa: E402
+import scripts.scrape_hospitals as pipeline  # noqa: E402
+from scripts.scrape_hospitals import identity_keys, map_to_schema, slugify  # noqa: E402
+
+
+def mapped(name, aliases=(), district="Gutu", province="Masvingo"):
+  return map_to_schema({"name": name, "aliases": list(aliases), "district": district, "province": province})
+
+
+class IdRegistryTests(unittest.TestCase):
+  def test_ids_survive_spelling_fix_and_reload(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      path = Path(tmp) / "ids.json"
+      registry = IdRegistry.load(path)
+      first = [mapped("Gutu Mision Hospital"), mapped("Chivi Clinic", district="Chivi")]
+      self.assertEqual(assign_ids(registry, [(identity_keys(r), r) for r in first]), {"new": 2})
+      registry.save()
+
+      # The corrected name is canonical now; the old spelling survives as an alias.
+      second = [mapped("Gutu Mission Hospital", aliases=["Gutu Mision Hospital"]), mapped("Chivi Clinic", district="Chivi")]
+      outcomes = assign_ids(IdRegistry.load(path), [(identity_keys(r), r) for r in second])
+      self.assertEqual(outcomes, {"reused": 2})
+      self.assertEqual([r["id"] for r in second], [r["id"] for r in first])
+      self.assertEqual(first[0]["id"], "gutu-mision-hospital-gutu")
+
+  def test_collisions_get_numbered_variants(self):
+    registry = IdRegistry(path=None)
+    harare = mapped("St Marys Clinic", district="Chitungwiza", province="Harare")
+    east = mapped("St Marys Clinic", district="Chitungwiza", province="Mashonaland East")
+    assign_ids(registry, [(identity_keys(r), r) for r in [harare, east]])
+    self.assertEqual([harare["id"], east["id"]], ["st-marys-clinic-chitungwiza", "st-marys-clinic-chitungwiza-2"])
+    self.assertEqual(len(registry.collisions), 1)
+    self.assertEqual(slugify("", ""), slugify("", ""))
+
+  def test_checkpointed_validate_follows_registry_edits(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      raw_dir = Path(tmp) / "raw"
+      raw_dir.mkdir()
+      (raw_dir / "seed.json").write_text(json.dumps([{"name": "Gutu Clinic", "district": "Gutu", "province": "Masvingo"}]))
+      legacy = Path(tmp) / "legacy_ids.json"
+      legacy.write_text(json.dumps({"version": 1, "ids": {"legacy-gutu-id": ["gutu clinic::gutu::masvingo"]}}))
+
+      def run(registry):
+        checkpoints = pipeline.StageCheckpoints(Path(tmp) / "stages")
+        return [r["id"] for r in pipeline.run_pipeline(["seed"], checkpoints, raw_dir, id_registry=registry)]
+
+      with mock.patch.object(pipeline, "fetch_remote_sources"), mock.patch("builtins.print"):
+        self.assertEqual(run(IdRegistry.load(Path(tmp) / "ids.json")), ["gutu-clinic-gutu"])
+        self.assertEqual(run(IdRegistry.load(legacy)), ["legacy-gutu-id"])
+
+
+if __name__ == "__main__":
+  unittest.main()
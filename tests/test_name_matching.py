@@ -0,0 +1,50 @@
+import importlib.util
+import sys
+from pathlib import Path
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "scripts"))
+
+from scripts.scrape_hospitals import dedup_assignments, deduplicate_facilities  # noqa: E402
+
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+FACILITIES = [
+  {"name": "Chitungwiza Central Hospital", "district": "Chitungwiza", "province": "Harare"},
+  {"name": "Gutu Mission Hospital", "district": "Gutu", "province": "Masvingo"},
+  {"name": "Chitungwiza Central Hosp.", "district": "Chitungwiza", "province": "Harare"},
+  {"name": "Gutu Mision Hospital", "district": "Gutu", "province": "Masvingo"},
+  {"name": "Gutu Mission Hospital", "district": "Mutare", "province": "Manicaland"},
+  {"name": "Chivi Rural Clinic", "district": "Chivi", "province": "Masvingo"},
+  # No province: only blocking by district pairs it with the Chivi clinic above.
+  {"name": "Chivi Rural Clinik", "district": "Chivi", "province": ""},
+]
+
+
+@unittest.skipUnless(NUMPY_AVAILABLE, "numpy not installed")
+class NameMatchingTests(unittest.TestCase):
+  def test_candidate_pairs_stay_within_group(self):
+    from scripts.name_matching import candidate_pairs
+
+    names = ["gutu mission hospital", "chivi clinic", "gutu mision hospital", "gutu mission hospital"]
+    pairs = candidate_pairs(names, ["masvingo", "masvingo", "masvingo", "manicaland"])
+    self.assertEqual([(later, earlier) for later, earlier, _ in pairs], [(2, 0)])
+    self.assertGreater(pairs[0][2], 0.8)
+    self.assertEqual(candidate_pairs(names[:1] + names[3:], threshold=0.99)[0][:2], (1, 0))
+
+  def test_tfidf_engine_agrees_with_sequence_engine(self):
+    _, sequence = dedup_assignments([dict(r) for r in FACILITIES])
+    merged, tfidf = dedup_assignments([dict(r) for r in FACILITIES], engine="tfidf")
+    self.assertEqual(tfidf, sequence)
+    self.assertEqual(tfidf, [0, 1, 0, 1, 2, 3, 3])
+    self.assertIn("Chitungwiza Central Hosp.", merged[0]["aliases"])
+    sequence_merged = deduplicate_facilities([dict(r) for r in FACILITIES])
+    self.assertEqual([r["confidence"] for r in merged], [r["confidence"] for r in sequence_merged])
+    with self.assertRaises(ValueError):
+      deduplicate_facilities(FACILITIES, engine="embeddings")
+
+
+if __name__ == "__main__":
+  unittest.main()
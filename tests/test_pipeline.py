@@ -1,4 +1,9 @@
+import json
+import subprocess
 import sys
+import tempfile
+from collections import Counter
+from unittest import mock
 from pathlib import Path
 import unittest
 
@@ -6,13 +11,25 @@ ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT))
 sys.path.append(str(ROOT / "scripts"))
 
+import scripts.scrape_hospitals as pipeline  # noqa: E402
 from scripts.scrape_hospitals import (  # noqa: E402
+    LOADERS,
+    STAGE_FUNCTIONS,
+    SUFFIX_FORMATS,
+    StageCheckpoints,
     classify_facility_type,
+    clean_phone,
     deduplicate_facilities,
     infer_default_services,
     infer_rural_urban,
+    load_html_tables,
+    load_pdf_tables,
+    loader_for,
     map_to_schema,
     normalize_raw_record,
+    register_loader,
+    run_pipeline,
+    sniff_format,
 )
 
 
@@ -42,6 +59,23 @@ class PipelineTests(unittest.TestCase):
     self.assertEqual(len(merged), 1)
     self.assertIn("Chitungwiza Central Hosp.", merged[0].get("aliases", []))
 
+  def test_exact_keys_merge_divergent_names(self):
+    facilities = [
+      {"name": "Parirenyatwa Group of Hospitals", "district": "Harare", "province": "Harare", "phone": "0242 701 555"},
+      {"name": "Pari Hospital", "district": "Harare", "province": "Harare", "phone": "+263 242 701555"},
+      {"name": "Trauma Centre", "district": "Harare", "province": "Harare", "website": "https://www.traumacentre.co.zw"},
+      {"name": "Borrowdale Trauma Centre & Hospital", "district": "Harare", "province": "Harare", "website": "traumacentre.co.zw/contact"},
+      {"name": "Green Cross Avondale", "district": "Harare", "province": "Harare", "website": "greencross.co.zw", "phone": "0242 111111"},
+      {"name": "Green Cross Belvedere", "district": "Harare", "province": "Harare", "website": "greencross.co.zw", "phone": "0242 222222"},
+    ]
+    stats = Counter()
+    merged = deduplicate_facilities(facilities, stats)
+    self.assertEqual(len(merged), 4)
+    self.assertIn("Pari Hospital", merged[0]["aliases"])
+    self.assertEqual(stats["phone"], 1)
+    self.assertEqual(stats["website"], 1)
+    self.assertEqual(clean_phone("0772 123 456", e164=True), "+263772123456")
+
   def test_normalize_raw_record(self):
     record = {
       "services": "ER; Maternity",
@@ -63,6 +97,122 @@ class PipelineTests(unittest.TestCase):
     mapped = map_to_schema(record)
     self.assertTrue(mapped.get("verified"))
 
+  def test_loader_dispatch_sniffs_content(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      html_as_xls = Path(tmp) / "mcaz.xls"
+      html_as_xls.write_text("<!DOCTYPE HTML>\n<html><table><tr><td>Name</td></tr></table></html>")
+      pdf_as_bin = Path(tmp) / "providers.bin"
+      pdf_as_bin.write_bytes(b"%PDF-1.5\n")
+      self.assertEqual(sniff_format(html_as_xls), "html")
+      self.assertIs(loader_for(html_as_xls), load_html_tables)
+      commented_export = Path(tmp) / "export.xls"
+      commented_export.write_text("<!-- exported -->\n<html><head><style>" + "td { }" * 1000 + "</style></head></html>")
+      self.assertEqual(sniff_format(commented_export), "html")
+      self.assertIs(loader_for(pdf_as_bin), load_pdf_tables)
+      # A missing optional parser skips the drop instead of failing the run.
+      with mock.patch.object(pipeline, "BS4_AVAILABLE", False), mock.patch("builtins.print") as printed:
+        self.assertEqual(list(load_html_tables(html_as_xls)), [])
+      printed.assert_called_once_with("Skipping mcaz.xls (beautifulsoup4 not installed)")
+      notes = Path(tmp) / "notes.txt"
+      notes.write_text("plain text")
+      self.assertIsNone(loader_for(notes))
+
+  def test_register_custom_loader(self):
+    @register_loader("tsv", suffixes=[".tsv"])
+    def load_tsv(path):
+      return [dict(zip(["name", "city"], line.split("\t"))) for line in path.read_text().splitlines()]
+
+    try:
+      with tempfile.TemporaryDirectory() as tmp:
+        drop = Path(tmp) / "extra.tsv"
+        drop.write_text("Gutu Clinic\tGutu\n")
+        self.assertEqual(loader_for(drop)(drop), [{"name": "Gutu Clinic", "city": "Gutu"}])
+    finally:
+      LOADERS.pop("tsv", None)
+      SUFFIX_FORMATS.pop(".tsv", None)
+
+  def test_stage_checkpoints_resume(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      raw_dir = Path(tmp) / "raw"
+      raw_dir.mkdir()
+      (raw_dir / "seed.json").write_text(json.dumps([
+        {"name": "Gutu Mission Hospital", "district": "Gutu", "province": "Masvingo"},
+        {"name": "Gutu Mission Hosp", "district": "Gutu", "province": "Masvingo"},
+      ]))
+      stage_dir = Path(tmp) / "stages"
+
+      def run(from_stage=None):
+        return run_pipeline(["seed"], StageCheckpoints(stage_dir, from_stage), raw_dir)
+
+      with mock.patch.object(pipeline, "fetch_remote_sources") as fetch:
+        first = run()
+        dedup = mock.Mock(side_effect=AssertionError("dedup should be reused"))
+        with mock.patch.dict(STAGE_FUNCTIONS, {"dedup": dedup}):
+          self.assertEqual(run(), first)
+          self.assertEqual(run(from_stage="map"), first)
+        self.assertEqual(fetch.call_count, 2)
+
+      self.assertEqual([r["name"] for r in first], ["Gutu Mission Hospital"])
+      self.assertTrue((stage_dir / "sources" / "seed.json.jsonl").exists())
+
+      # Artifacts from a restricted run must not be resumed into a run over more sources.
+      (raw_dir / "drop.csv").write_text("name,province,district\nChivi Rural Clinic,Masvingo,Chivi\n")
+      with self.assertRaisesRegex(ValueError, "built from sources seed.json but this run uses drop.csv, seed.json"):
+        run_pipeline(["seed", "drop"], StageCheckpoints(stage_dir, "map"), raw_dir, transport=pipeline.fixture_transport())
+      with self.assertRaisesRegex(ValueError, "stage 'dedup' was built from different inputs"):
+        run_pipeline(["seed"], StageCheckpoints(stage_dir, "map"), raw_dir, match_engine="tfidf", transport=pipeline.fixture_transport())
+      with self.assertRaises(ValueError):
+        pipeline.pipeline_sources(["missing"], raw_dir)
+
+  def test_scraper_rows_are_not_cached(self):
+    rows = [{"name": "Gutu Mission Hospital", "district": "Gutu", "province": "Masvingo", "source": ["ministry"]}]
+
+    def scraper_ministry_portal():
+      return [dict(row) for row in rows]
+
+    with tempfile.TemporaryDirectory() as tmp:
+      raw_dir = Path(tmp) / "raw"
+      raw_dir.mkdir()
+      stage_dir = Path(tmp) / "stages"
+
+      def run(from_stage=None):
+        return [r["name"] for r in run_pipeline(None, StageCheckpoints(stage_dir, from_stage), raw_dir)]
+
+      with mock.patch.object(pipeline, "SCRAPERS", [scraper_ministry_portal]), \
+          mock.patch.object(pipeline, "fetch_remote_sources"), mock.patch("builtins.print"):
+        self.assertEqual(run(), ["Gutu Mission Hospital"])
+        rows[0]["name"] = "Chivi Rural Hospital"
+        self.assertEqual(run(), ["Chivi Rural Hospital"])
+        rows[0]["name"] = "Masvingo Provincial Hospital"
+        self.assertEqual(run(from_stage="load"), ["Masvingo Provincial Hospital"])
+        rows[0]["name"] = "Ngomahuru Hospital"
+        with self.assertRaisesRegex(ValueError, "stage 'load' was built from different inputs"):
+          run(from_stage="map")
+      self.assertEqual(list((stage_dir / "sources").iterdir()), [])
+
+  def test_stages_stream_rows(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      raw_dir = Path(tmp)
+      (raw_dir / "drop.csv").write_text("name,province\nGutu Clinic,Masvingo\nChivi Clinic,Masvingo\n")
+      sources = pipeline.pipeline_sources(["drop"], raw_dir)
+      checkpoints = StageCheckpoints(raw_dir / "stages")
+      rows = pipeline.stage_normalize(pipeline.stage_load(sources, checkpoints))
+      self.assertEqual(next(rows)["name"], "Gutu Clinic")
+      meta = raw_dir / "stages" / "sources" / "drop.csv.meta.json"
+      self.assertFalse(meta.exists())
+      self.assertEqual([row["name"] for row in rows], ["Chivi Clinic"])
+      self.assertTrue(meta.exists())
+
+  def test_import_skips_heavy_parsers(self):
+    probe = (
+      "import json, sys; import scrape_hospitals; "
+      "print(json.dumps([m for m in ('openpyxl', 'pdfplumber', 'pdfminer', 'PIL', 'xlrd', 'bs4') if m in sys.modules]))"
+    )
+    result = subprocess.run(
+      [sys.executable, "-c", probe], cwd=ROOT / "scripts", capture_output=True, text=True, check=True,
+    )
+    self.assertEqual(json.loads(result.stdout), [])
+
 
 if __name__ == "__main__":
   unittest.main()
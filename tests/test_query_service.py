@@ -0,0 +1,74 @@
+import json
+import sys
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "scripts"))
+
+from scripts.query_service import CatalogueIndex, QueryError, make_server, parse_query  # noqa: E402
+
+RECORDS = [
+  {"id": "a", "name": "Mpilo Central Hospital", "province": "Bulawayo", "services": ["ER", "ICU"], "open_24h": True, "tier": "Tier 1"},
+  {"id": "b", "name": "Gutu Clinic", "province": "Masvingo", "services": ["OPD"], "open_24h": False, "tier": "Tier 3"},
+  {"id": "c", "name": "Masvingo Provincial Hospital", "province": "Masvingo", "services": ["ER"], "open_24h": True, "tier": "Tier 2"},
+]
+
+
+class QueryServiceTests(unittest.TestCase):
+  def test_index_intersects_filters(self):
+    index = CatalogueIndex(RECORDS, version="test")
+    self.assertEqual(index.match({"province": "masvingo", "services": "ER"}), [2])
+    self.assertEqual(index.match({"open_24h": "true"}), [0, 2])
+    self.assertEqual(index.match({}), [0, 1, 2])
+    with self.assertRaises(QueryError):
+      parse_query("page=0")
+
+  def test_repeated_filters_match_any_value(self):
+    filters, page, per_page = parse_query("province=Masvingo&province=Bulawayo&tier=Tier+1&tier=Tier+2&province=Masvingo")
+    self.assertEqual(filters, {"province": ["Bulawayo", "Masvingo"], "tier": ["Tier 1", "Tier 2"]})
+    self.assertEqual((page, per_page), (1, 50))
+    self.assertEqual(CatalogueIndex(RECORDS, version="test").match(filters), [0, 2])
+    with self.assertRaisesRegex(QueryError, "page may only be given once"):
+      parse_query("page=1&page=2")
+
+  def test_boolean_filters_accept_facet_spellings(self):
+    index = CatalogueIndex(RECORDS + [{"id": "d", "open_24h": "No", "verified": "yes"}], version="test")
+    for query in ("open_24h=1", "open_24h=yes", "open_24h=True"):
+      filters, _, _ = parse_query(query)
+      self.assertEqual(filters, {"open_24h": ["true"]}, query)
+      self.assertEqual(index.match(filters), [0, 2], query)
+    self.assertEqual(index.match(parse_query("open_24h=0&open_24h=no")[0]), [1, 3])
+    self.assertEqual(index.match(parse_query("verified=y")[0]), [3])
+    with self.assertRaisesRegex(QueryError, "verified must be true or false"):
+      parse_query("verified=maybe")
+
+  def test_http_pagination_and_etag(self):
+    server = make_server(CatalogueIndex(RECORDS, version="test"), port=0, quiet=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+      with urllib.request.urlopen(f"{base}/facilities?province=Masvingo&per_page=1&page=2") as resp:
+        payload = json.loads(resp.read())
+        etag = resp.headers["ETag"]
+      self.assertEqual(payload["total"], 2)
+      self.assertEqual([r["id"] for r in payload["results"]], ["c"])
+
+      request = urllib.request.Request(
+        f"{base}/facilities?page=2&province=Masvingo&per_page=1",
+        headers={"If-None-Match": etag},
+      )
+      with self.assertRaises(urllib.error.HTTPError) as ctx:
+        urllib.request.urlopen(request)
+      self.assertEqual(ctx.exception.code, 304)
+    finally:
+      server.shutdown()
+      server.server_close()
+
+
+if __name__ == "__main__":
+  unittest.main()
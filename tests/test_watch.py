@@ -0,0 +1,46 @@
+import json
+import sys
+import tempfile
+from pathlib import Path
+import unittest
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / "scripts"))
+
+import scripts.scrape_hospitals as pipeline  # noqa: E402
+from scripts.watch import RawWatcher  # noqa: E402
+
+
+class RawWatcherTests(unittest.TestCase):
+  def test_rebuilds_only_after_drop_settles(self):
+    with tempfile.TemporaryDirectory() as tmp:
+      raw_dir = Path(tmp) / "raw"
+      raw_dir.mkdir()
+      (raw_dir / "seed.json").write_text(json.dumps([{"name": "Gutu Mission Hospital", "district": "Gutu", "province": "Masvingo"}]))
+      output = Path(tmp) / "scraped.json"
+      watcher = RawWatcher(raw_dir, output, merge=False, scrapers=[])
+
+      self.assertEqual(watcher.rebuild()["records"], 1)
+      self.assertIsNone(watcher.poll())
+
+      (raw_dir / "drop.csv").write_text("name,province,district\nChivi Rural Clinic,Masvingo,Chivi\n")
+      self.assertIsNone(watcher.poll())
+      report = watcher.poll()
+      self.assertEqual((report["changed"], report["records"]), (1, 2))
+      self.assertGreaterEqual(report["latency_seconds"], 0)
+
+      records = json.loads(output.read_text())
+      expected = pipeline.stage_validate(pipeline.stage_map(pipeline.stage_dedup(
+        pipeline.stage_normalize(pipeline.stage_load(pipeline.pipeline_sources(["seed", "drop"], raw_dir)))
+      )))
+      self.assertEqual(records, json.loads(json.dumps(expected)))
+      self.assertEqual([path.name for path in Path(tmp).glob(".*.tmp")], [])
+
+      (raw_dir / "drop.csv").unlink()
+      watcher.poll()
+      self.assertEqual(watcher.poll()["records"], 1)
+
+
+if __name__ == "__main__":
+  unittest.main()